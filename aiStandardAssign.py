@@ -0,0 +1,137 @@
+#Jaroslav Lajta
+
+"""
+Assigns the built shading groups to the meshes of the scene by name
+Mesh names are split with the same tokenizer the textures are classified with, so Body_geo, body-low and BodyGeo all
+belong to the texture set Body, a mesh goes to the material whose name matches the most of its words
+The mesh transforms are read with two queries and every shading group gets its meshes in one sets -forceElement call
+"""
+
+from collections import defaultdict
+
+import aiStandardCore as core
+import aiStandardNetwork as network
+import aiStandardTiming as timing
+
+
+class MeshIndex:
+    """
+    Mesh transforms of the scene by the words of their names, made once for all the materials
+    """
+
+    def __init__(self, transforms: list, matcher: core.TextureMatcher):
+        self.matcher = matcher
+        #First word of a run -> (transform, words of its name, position of the word)
+        self.words = defaultdict(list)
+
+        for transform in transforms:
+            words = matcher.tokenize(self.short_name(transform))
+            for position, word in enumerate(words):
+                self.words[word].append((transform, words, position))
+
+    @staticmethod
+    def short_name(transform: str) -> str:
+        """
+        Returns the name of a node without its path and namespace
+        """
+        return transform.rsplit("|", 1)[-1].rsplit(":", 1)[-1]
+
+    def find(self, name: str) -> list:
+        """
+        Returns the transforms whose names have all the words of a name in a row, and how many words that is
+        """
+        name_words = self.matcher.tokenize(name)
+        if not name_words:
+            return []
+
+        found = []
+        for transform, words, position in self.words.get(name_words[0], []):
+            if words[position:position + len(name_words)] == name_words:
+                found.append(transform)
+        return [(transform, len(name_words)) for transform in dict.fromkeys(found)]
+
+
+def mesh_transforms() -> list:
+    """
+    Returns the full paths of the transforms of every mesh in the scene that isn't an intermediate object
+    """
+    meshes = network.cmds.ls(type="mesh", noIntermediate=True, long=True) or []
+    if not meshes:
+        return []
+    return sorted(set(network.cmds.listRelatives(meshes, parent=True, fullPath=True) or []))
+
+
+def material_names(shader_name: str, base_name: str = None, set_name: str = None) -> list:
+    """
+    Returns the names a material is matched to meshes with, the shader name and the texture set
+    Without the set name it is worked out from the shader name, the part after the base name
+    """
+    names = [shader_name]
+    if set_name is None and base_name and shader_name.startswith(f"{base_name}_"):
+        set_name = shader_name[len(base_name) + 1:]
+    if set_name:
+        names.append(set_name)
+    return names
+
+
+def match_meshes(materials: list, index: MeshIndex, warn=network.raise_warning) -> dict:
+    """
+    Works out which meshes every shading group goes to, materials are (names, shading group) pairs
+    A mesh goes to the material with the longest matching name, meshes two materials match equally well are skipped
+    Returns the mesh transforms by shading group
+    """
+    best = {}
+    for names, shading_group in materials:
+        for name in names:
+            for transform, length in index.find(name):
+                found = best.get(transform)
+                if found is None or length > found[0]:
+                    best[transform] = (length, {shading_group})
+                elif length == found[0]:
+                    found[1].add(shading_group)
+
+    assignments = defaultdict(list)
+    for transform, (length, shading_groups) in sorted(best.items()):
+        if len(shading_groups) > 1:
+            warn(f"{MeshIndex.short_name(transform)} matches {', '.join(sorted(shading_groups))} equally well, it isn't assigned")
+            continue
+        assignments[shading_groups.pop()].append(transform)
+    return dict(assignments)
+
+
+def assign_shading_groups(assignments: dict):
+    """
+    Assigns every shading group to its meshes, one sets call per shading group and one undo step for all
+    """
+    network.cmds.undoInfo(openChunk=True, chunkName="aiStandardAssign")
+    try:
+        for shading_group, transforms in sorted(assignments.items()):
+            network.cmds.sets(transforms, edit=True, forceElement=shading_group)
+    finally:
+        network.cmds.undoInfo(closeChunk=True)
+
+
+@timing.run("assign")
+def assign_materials(materials: list, matcher: core.TextureMatcher = None, warn=network.raise_warning) -> dict:
+    """
+    Assigns the shading groups of the materials to the meshes their names match, materials are (names, shading group) pairs
+    The mesh names are indexed once, see match_meshes
+    Returns the mesh transforms by shading group
+    """
+    if matcher is None:
+        matcher = core.get_shader_config().matcher
+
+    with timing.phase("index"):
+        index = MeshIndex(mesh_transforms(), matcher)
+    with timing.phase("match"):
+        assignments = match_meshes(materials, index, warn)
+    if assignments:
+        with timing.phase("assign"):
+            assign_shading_groups(assignments)
+
+    for names, shading_group in materials:
+        if shading_group not in assignments:
+            warn(f"No mesh matches {' or '.join(names)}")
+
+    timing.note(meshes=sum(len(transforms) for transforms in assignments.values()), shadingGroups=len(assignments))
+    return assignments
@@ -0,0 +1,325 @@
+#Jaroslav Lajta
+
+"""
+Audits the file nodes of the shader networks in the scene
+
+    mayapy aiStandardAudit.py D:/scenes/environment.ma [--fix] [--output D:/scenes/environment_fixed.ma]
+
+The file nodes feeding aiStandardSurface, displacementShader and aiNormalMap nodes are found with one history query
+Their directories are listed on a thread pool, one listing per directory instead of one request per file, so missing,
+empty and stale files are found without waiting on the file server for every texture
+The color spaces are compared with what a build would set, the rules of the JSON config corrected by the image headers
+the probe reads, .tx files by the header of their source image, and can be fixed in one undo step
+"""
+
+import os
+import re
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import aiStandardCore as core
+import aiStandardBatch as batch
+import aiStandardNetwork as network
+import aiStandardProbe as probe
+import aiStandardTiming as timing
+
+
+#Shading nodes whose upstream file nodes are audited
+AUDITED_TYPES = ["aiStandardSurface", "displacementShader", "aiNormalMap"]
+
+#Tile and frame tokens Maya understands in fileTextureName
+TILE_TOKENS = re.compile(r'(<UDIM>|<U>|<V>|<f>)', re.IGNORECASE)
+
+#Float images are stored linear, the probe gives them a linear color space whatever the config says
+#Only used for the images the probe can't read, the others are told apart by their header
+FLOAT_EXTENSIONS = (".exr", ".hdr")
+
+
+def network_file_nodes() -> list:
+    """
+    Returns every file node upstream of an audited shading node, found with one history query
+    """
+    shading_nodes = network.cmds.ls(type=AUDITED_TYPES) or []
+    if not shading_nodes:
+        return []
+    history = network.cmds.listHistory(shading_nodes) or []
+    return sorted(set(network.cmds.ls(history, type="file") or []))
+
+
+def read_file_nodes(nodes: list) -> dict:
+    """
+    Returns the path and color space of every file node
+    With OpenMaya the plugs are read straight from the nodes instead of one getAttr per attribute
+    """
+    file_nodes = {}
+    if network.om is None:
+        for node in nodes:
+            file_nodes[node] = (network.cmds.getAttr(f"{node}.fileTextureName") or "", network.cmds.getAttr(f"{node}.colorSpace"))
+        return file_nodes
+
+    selection = network.om.MSelectionList()
+    for node in nodes:
+        selection.add(node)
+    for position, node in enumerate(nodes):
+        node_fn = network.om.MFnDependencyNode(selection.getDependNode(position))
+        file_nodes[node] = (node_fn.findPlug("fileTextureName", False).asString(), node_fn.findPlug("colorSpace", False).asString())
+    return file_nodes
+
+
+def resolve_path(file_path: str, root: str = None) -> str:
+    """
+    Returns the path a file node reads, with environment variables expanded and relative paths taken from the project root
+    """
+    file_path = os.path.expandvars(file_path)
+    if root is not None and not os.path.isabs(file_path):
+        file_path = os.path.join(root, file_path)
+    return os.path.normpath(file_path)
+
+
+def list_directory(folder: str):
+    """
+    Returns the size and mtime of every file in a folder by its name in the case of the platform, None when the folder can't be read
+    """
+    try:
+        with os.scandir(folder) as entries:
+            return {os.path.normcase(entry.name): (entry.stat().st_size, entry.stat().st_mtime_ns)
+                    for entry in entries if entry.is_file()}
+    except OSError:
+        return None
+
+
+def list_directories(folders, workers: int = core.IO_WORKERS) -> dict:
+    """
+    Lists many folders at once on a thread pool
+    Returns the listing of every folder, see list_directory
+    """
+    folders = sorted(set(folders))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(folders, executor.map(list_directory, folders)))
+
+
+def matching_files(filename: str, listing: dict) -> list:
+    """
+    Returns the names in a listing a file node reads, every tile when the name has tile tokens
+    """
+    filename = os.path.normcase(filename)
+    if not TILE_TOKENS.search(filename):
+        return [filename] if filename in listing else []
+
+    pattern = re.compile("".join("[0-9]+" if TILE_TOKENS.fullmatch(part) else re.escape(part)
+                                 for part in TILE_TOKENS.split(filename)))
+    return sorted(name for name in listing if pattern.fullmatch(name))
+
+
+def source_mtimes(listing: dict, extensions: frozenset) -> dict:
+    """
+    Returns the newest mtime of the source images in a listing by their name without extension
+    """
+    sources = {}
+    for name, (size, mtime) in listing.items():
+        stem, extension = os.path.splitext(name)
+        if extension.lower()[1:] in extensions:
+            sources[stem] = max(mtime, sources.get(stem, mtime))
+    return sources
+
+
+def source_names(listing: dict, extensions: frozenset) -> dict:
+    """
+    Returns the names of the source images in a listing by their name without extension
+    """
+    names = {}
+    for name in sorted(listing):
+        stem, extension = os.path.splitext(name)
+        if extension.lower()[1:] in extensions:
+            names.setdefault(stem, name)
+    return names
+
+
+def stale_tx(name: str, listing: dict, sources: dict) -> bool:
+    """
+    True when a .tx file is older than the source image next to it, sources are the source_mtimes of the listing
+    """
+    stem, extension = os.path.splitext(name)
+    return extension.lower() == ".tx" and sources.get(stem, 0) > listing[name][1]
+
+
+def expected_color_spaces(filename: str, shader_config: core.ShaderConfig, linear_color_space: str = None,
+                          info: dict = None, image: str = None):
+    """
+    Returns the color spaces a build could have given a texture, None when the name isn't a texture type
+    info is the header of the image, the first color space is then the one the probe picks and otherwise the config's own
+    image is the file the texture was made from, the source image of a .tx, whose extension tells float images without info
+    """
+    found = shader_config.matcher.match(filename)
+    if not found:
+        return None
+
+    rule = shader_config.textures[found[0]]
+    allowed = [rule.color_space]
+    if info is not None:
+        suggested = probe.suggest_settings(found[0], core.texture_entry(filename, rule), info, linear_color_space)[0]
+        allowed.insert(0, suggested)
+        is_float = info["float"]
+    else:
+        is_float = os.path.splitext(image or filename)[1].lower() in FLOAT_EXTENSIONS
+    if is_float:
+        allowed.extend(space for space in (linear_color_space, probe.RAW_COLOR_SPACE) if space is not None)
+    return list(dict.fromkeys(allowed))
+
+
+def problem(node: str, file_path: str, kind: str, message: str, color_space: str = None) -> dict:
+    """
+    Returns one entry of the audit report
+    """
+    return {"node": node, "filePath": file_path, "problem": kind, "message": message, "colorSpace": color_space}
+
+
+def audit_file_nodes(file_nodes: dict, shader_config: core.ShaderConfig = None, color_spaces=None, root: str = None,
+                     workers: int = core.IO_WORKERS) -> list:
+    """
+    Checks the files and color spaces of the file nodes, file_nodes are the path and color space by node
+    Problems are "missing", "empty", "staleTx", "unknownColorSpace" and "colorSpace"
+    The headers of the images, or of the source images of .tx files, are read on a thread pool, see expected_color_spaces
+    Color space problems carry the color space a build would set under "colorSpace", fix_color_spaces sets it
+    Returns the report, one entry per problem
+    """
+    if shader_config is None:
+        shader_config = core.get_shader_config()
+    extensions = core.image_extensions()
+    linear_color_space = probe.pick_linear_color_space(color_spaces)
+
+    paths = {node: resolve_path(file_path, root) for node, (file_path, color_space) in file_nodes.items() if file_path}
+    with timing.phase("list"):
+        listings = list_directories({os.path.dirname(file_path) for file_path in paths.values()}, workers)
+
+    #Source images by folder, only worked out for folders with .tx files
+    sources = {}
+    source_files = {}
+
+    #Files every node reads, and the image it was made from, the first tile or the source image of a .tx
+    found = {}
+    images = {}
+    for node, file_path in paths.items():
+        folder, filename = os.path.split(file_path)
+        names = found[node] = matching_files(filename, listings[folder] or {})
+        if not names:
+            continue
+        stem, extension = os.path.splitext(names[0])
+        if extension.lower() == ".tx":
+            name = source_files.setdefault(folder, source_names(listings[folder], extensions)).get(stem)
+            if name is None:
+                continue
+        else:
+            name = names[0]
+        images[node] = os.path.join(folder, name)
+
+    with timing.phase("probe"):
+        infos = probe.probe_images({image for image in images.values()
+                                    if image.rpartition(".")[2].lower() in probe.PROBED_EXTENSIONS}, workers)
+
+    report = []
+    for node, (file_path, color_space) in sorted(file_nodes.items()):
+        if not file_path:
+            report.append(problem(node, file_path, "missing", f"{node} has no file"))
+            continue
+
+        folder, filename = os.path.split(paths[node])
+        listing = listings[folder] or {}
+        names = found[node]
+
+        if not names:
+            report.append(problem(node, file_path, "missing", f"{node} reads {file_path} which is missing"))
+        elif any(listing[name][0] == 0 for name in names):
+            report.append(problem(node, file_path, "empty", f"{node} reads {file_path} which is empty"))
+        elif filename.lower().endswith(".tx") and \
+                any(stale_tx(name, listing, sources.setdefault(folder, source_mtimes(listing, extensions))) for name in names):
+            report.append(problem(node, file_path, "staleTx", f"{node} reads {file_path} which is older than its source image"))
+
+        image = images.get(node)
+        allowed = expected_color_spaces(filename, shader_config, linear_color_space, infos.get(image), image)
+        fix = next((space for space in allowed or [] if color_spaces is None or space in color_spaces), None)
+        if color_spaces is not None and color_space not in color_spaces:
+            report.append(problem(node, file_path, "unknownColorSpace",
+                                  f"{node} uses {color_space} which isn't in the color management config", fix))
+        elif allowed is not None and color_space not in allowed:
+            report.append(problem(node, file_path, "colorSpace", f"{node} uses {color_space} but {allowed[0]} is expected", fix))
+
+    timing.note(fileNodes=len(file_nodes), folders=len(listings), probed=len(infos), problems=len(report))
+    return report
+
+
+def fix_color_spaces(report: list) -> int:
+    """
+    Sets the expected color space on every file node the report has a color space problem for, all in one undo step
+    Returns how many file nodes were changed
+    """
+    fixes = [entry for entry in report if entry["problem"] in ("colorSpace", "unknownColorSpace") and entry["colorSpace"] is not None]
+    if not fixes:
+        return 0
+
+    builder = network.CmdsBuilder("aiStandardAudit")
+    try:
+        for entry in fixes:
+            builder.set_attr(entry["node"], "colorSpace", entry["colorSpace"])
+    except Exception:
+        builder.abort()
+        raise
+    builder.finish()
+    return len(fixes)
+
+
+def summary(report: list) -> str:
+    """
+    Returns how many problems of every kind the report has in one line
+    """
+    counts = {}
+    for entry in report:
+        counts[entry["problem"]] = counts.get(entry["problem"], 0) + 1
+    if not counts:
+        return "No problems found"
+    return ", ".join(f"{count} {kind}" for kind, count in sorted(counts.items()))
+
+
+@timing.run("audit")
+def audit_scene(shader_config: core.ShaderConfig = None, fix: bool = False, warn=network.raise_warning,
+                workers: int = core.IO_WORKERS) -> list:
+    """
+    Audits every file node of the shader networks in the scene and warns about each problem
+    fix sets the expected color spaces on the file nodes that don't have one of them
+    Returns the report, see audit_file_nodes
+    """
+    with timing.phase("query"):
+        file_nodes = read_file_nodes(network_file_nodes())
+    root = network.cmds.workspace(query=True, rootDirectory=True)
+    report = audit_file_nodes(file_nodes, shader_config, network.color_spaces(), root, workers)
+
+    for entry in report:
+        warn(entry["message"])
+    if fix:
+        fixed = fix_color_spaces(report)
+        timing.note(fixed=fixed)
+    return report
+
+
+@timing.run("audit_batch")
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Audits the file nodes of the shader networks in a scene")
+    parser.add_argument("scene", help="Scene to audit")
+    parser.add_argument("--fix", action="store_true", help="Set the expected color spaces on the file nodes that don't have one of them")
+    parser.add_argument("--config", default=None, help="Path to a different JSON config")
+    parser.add_argument("--output", default=None, help="Saves the scene to this file when done, with --fix")
+    args = parser.parse_args(argv)
+
+    batch.start_standalone(args.scene)
+
+    report = audit_scene(core.get_shader_config(args.config), args.fix, print)
+    print(summary(report))
+    print(timing.current().summary())
+
+    batch.finish_standalone(args.output)
+    return 1 if report else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+#Jaroslav Lajta
+
+"""
+Builds aiStandardSurface shaders for whole texture libraries without the window
+
+Inside Maya:
+    import aiStandardBatch
+    aiStandardBatch.build_library("D:/textures/delivery_01")
+
+From the command line:
+    mayapy aiStandardBatch.py D:/textures/delivery_01 --output D:/scenes/delivery_01.ma
+    mayapy aiStandardBatch.py D:/manifests/delivery_01.json --manifests --output D:/scenes/delivery_01.ma
+"""
+
+import os
+import sys
+import json
+import argparse
+import itertools
+
+import aiStandardCore as core
+import aiStandardCache as cache
+import aiStandardNetwork as network
+import aiStandardProbe as probe
+import aiStandardTx as tx
+import aiStandardTiming as timing
+import aiStandardManifest as manifest
+import aiStandardDedup as dedup
+import aiStandardAssign as assign
+
+
+def start_standalone(scene: str = None):
+    """
+    Starts Maya without its interface for the command line tools, with Arnold loaded and the scene opened when one is given
+    Returns maya.cmds
+    """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+    from maya import cmds
+    cmds.loadPlugin("mtoa", quiet=True)
+    if scene:
+        cmds.file(scene, open=True, force=True)
+    return cmds
+
+
+def finish_standalone(output: str = None):
+    """
+    Saves the scene to output when one is given, as Maya ASCII for .ma files, and shuts the Maya of start_standalone down
+    """
+    import maya.standalone
+    from maya import cmds
+
+    if output:
+        cmds.file(rename=output)
+        cmds.file(save=True, type="mayaAscii" if output.lower().endswith(".ma") else "mayaBinary")
+    maya.standalone.uninitialize()
+
+
+def find_asset_folders(library_root: str, file_format=core.FILE_FORMATS, nested: bool = True) -> list:
+    """
+    Returns every folder under the library root that directly contains at least one image
+    With nested turned off, folders inside an asset folder are left out since the asset scan already covers them
+    """
+    extensions = core.image_extensions(file_format)
+    asset_folders = []
+
+    for folder, sub_folders, files in os.walk(library_root):
+        sub_folders.sort()
+        if any(file.rpartition('.')[2].lower() in extensions for file in files):
+            asset_folders.append(folder.replace("\\", "/"))
+            if not nested:
+                sub_folders.clear()
+
+    return asset_folders
+
+
+def plan_materials(folders, shader_config: core.ShaderConfig = None, normal_type: str = None, warn=network.raise_warning,
+                   recursive: bool = False, max_depth: int = None, scan_cache: cache.ScanCache = None,
+                   shared_placement: bool = True, probe_headers: bool = True, color_spaces=None, make_tx: bool = False,
+                   converter: str = None, split_sets: bool = False, materials: list = None,
+                   hash_cache: cache.HashCache = None) -> list:
+    """
+    Runs the matching for every folder and works out its shader network, without touching Maya
+    Shaders are named after their folder, recursive also takes the textures from their subfolders
+    probe_headers reads the image headers to pick the color spaces, out of color_spaces when they are given
+    make_tx converts the textures to .tx with the converter and points the file nodes at them
+    split_sets makes a shader for every texture set of a folder, named after the folder and the set
+    When materials is a list, the resolved material of every plan is added to it for a manifest
+    With a hash cache, identical images across all the folders are pointed at one copy before anything is planned
+    Returns a list of (folder, plan), folders without usable textures are skipped
+    """
+    if shader_config is None:
+        shader_config = core.get_shader_config()
+
+    matcher = scan_cache.matcher if scan_cache is not None else shader_config.matcher
+    plans = []
+    found = []
+
+    for folder in folders:
+        texture_sets, warnings = core.load_texture_maps(folder, shader_config, matcher=matcher, recursive=recursive,
+                                                        max_depth=max_depth, cache=scan_cache, split_sets=split_sets)
+        if not split_sets:
+            texture_sets = {"": texture_sets} if texture_sets else {}
+        found.append((folder, texture_sets, warnings))
+
+    if hash_cache is not None:
+        dedup.apply_dedup([texture_maps for folder, texture_sets, warnings in found for texture_maps in texture_sets.values()],
+                          hash_cache)
+
+    for folder, texture_sets, warnings in found:
+        for texture_maps in texture_sets.values():
+            if probe_headers:
+                warnings.extend(probe.apply_probe(texture_maps, color_spaces))
+            if make_tx:
+                warnings.extend(tx.apply_tx(texture_maps, converter))
+
+        for msg in warnings:
+            warn(msg)
+
+        if len(texture_sets) == 0:
+            warn(f"Didn't find any usable files in {folder}")
+            continue
+
+        folder_name = core.shader_name_from_folder(folder)
+        with timing.phase("plan"):
+            for set_name in sorted(texture_sets, key=str.lower):
+                shader_name = core.shader_name_for_set(folder_name, set_name)
+                plans.append((folder, network.plan_shader_network(shader_name, texture_sets[set_name], normal_type,
+                                                                  shared_placement)))
+                if materials is not None:
+                    materials.append(manifest.material_entry(shader_name, texture_sets[set_name], normal_type,
+                                                             shared_placement, folder))
+
+    return plans
+
+
+def execute_materials(plans: list, backend: str = None, warn=network.raise_warning, index: network.FileNodeIndex = None,
+                      templates: network.NetworkTemplates = None, update: bool = False) -> list:
+    """
+    Builds the plans of plan_materials, the shaders of one folder are built together in one go
+    With templates, a shader is cloned from the network of its layout built before it, when there is one
+    With update, shaders already in the scene get their network changed to match instead of a second shader
+    Returns a list of (folder, node names)
+    """
+    results = []
+    for folder, folder_plans in itertools.groupby(plans, key=lambda folder_plan: folder_plan[0]):
+        folder_plans = [plan for plan_folder, plan in folder_plans]
+        updated = network.update_existing(folder_plans, backend, warn, index) if update else {}
+
+        new_plans = [plan for position, plan in enumerate(folder_plans) if position not in updated]
+        if templates is not None:
+            built = iter(network.execute_from_templates(new_plans, templates, backend, warn, index))
+        else:
+            built = iter(network.execute_plans(new_plans, network.make_builder(backend), warn, index))
+        for position in range(len(folder_plans)):
+            results.append((folder, updated[position] if position in updated else next(built)))
+    return results
+
+
+def assign_results(results: list, matcher: core.TextureMatcher = None, warn=network.raise_warning) -> dict:
+    """
+    Assigns the shading groups of execute_materials to the meshes named like their texture set or shader
+    The texture set is the part of the shader name after the folder name
+    Returns the mesh transforms by shading group
+    """
+    materials = []
+    for folder, names in results:
+        base_name = core.shader_name_from_folder(folder) if folder else None
+        materials.append((assign.material_names(names["shader"], base_name), names["shadingGroup"]))
+    return assign.assign_materials(materials, matcher, warn)
+
+
+@timing.run("build_materials")
+def build_materials(folders, shader_config: core.ShaderConfig = None, normal_type: str = None, warn=network.raise_warning,
+                    recursive: bool = False, max_depth: int = None, scan_cache: cache.ScanCache = None,
+                    shared_placement: bool = True, backend: str = None, probe_headers: bool = True, make_tx: bool = False,
+                    reuse_files: bool = True, split_sets: bool = False, hash_cache: cache.HashCache = None,
+                    templates: network.NetworkTemplates = None, update: bool = False, assign_meshes: bool = False) -> list:
+    """
+    Runs the matching and the network build for every folder
+    reuse_files connects file nodes already in the scene, or made for an earlier folder, instead of loading a texture twice
+    split_sets makes a shader for every texture set of a folder
+    With a hash cache, identical images saved under different names are loaded once
+    With templates, shaders with the same layout are cloned from the first one instead of built node by node
+    With update, shaders already in the scene get their network changed to match the textures
+    assign_meshes assigns every shading group to the meshes named like its texture set or shader, see assign_results
+    Returns a list of (folder, shader, shading group), folders without usable textures are skipped
+    """
+    color_spaces = network.color_spaces() if probe_headers else None
+    index = network.file_index() if reuse_files else None
+
+    plans = plan_materials(folders, shader_config, normal_type, warn, recursive, max_depth, scan_cache, shared_placement,
+                           probe_headers, color_spaces, make_tx, split_sets=split_sets, hash_cache=hash_cache)
+    results = execute_materials(plans, backend, warn, index, templates, update)
+    if assign_meshes:
+        assign_results(results, shader_config.matcher if shader_config is not None else None, warn)
+    return [(folder, names["shader"], names["shadingGroup"]) for folder, names in results]
+
+
+def build_library(library_root: str, shader_config: core.ShaderConfig = None, normal_type: str = None, warn=network.raise_warning,
+                  recursive: bool = False, max_depth: int = None) -> list:
+    """
+    Finds all the asset folders of a library and builds a shader for each of them
+    """
+    folders = find_asset_folders(library_root, nested=not recursive)
+    return build_materials(folders, shader_config, normal_type, warn, recursive, max_depth)
+
+
+@timing.run("batch")
+def main(argv=None) -> int:
+    """
+    Command line entry point, meant to be run with mayapy
+    """
+    parser = argparse.ArgumentParser(description="Creates aiStandardSurface shaders for texture folders")
+    parser.add_argument("paths", nargs="+", help="Library roots, or asset folders when --folders is used, or manifests when --manifests is used")
+    parser.add_argument("--folders", action="store_true", help="Treat the paths as asset folders and don't search inside them")
+    parser.add_argument("--manifests", action="store_true", help="Treat the paths as manifests and build them without scanning")
+    parser.add_argument("--check", action="store_true", help="With --manifests, warn about textures that are missing or changed since the manifest was written")
+    parser.add_argument("--save-manifest", default=None, help="Writes the resolved materials to a manifest that --manifests can build from")
+    parser.add_argument("--normal", choices=core.NORMAL_TYPES, default=None, help="Preferred normal map type")
+    parser.add_argument("--recursive", action="store_true", help="Also use the textures inside subfolders of an asset folder")
+    parser.add_argument("--max-depth", type=int, default=None, help="How many levels of subfolders --recursive enters")
+    parser.add_argument("--texture-sets", action="store_true", help="Make a shader for every texture set of a folder, like Body_BaseColor and Head_BaseColor")
+    parser.add_argument("--separate-placement", action="store_true", help="Give every file node its own place2dTexture")
+    parser.add_argument("--backend", choices=["api", "cmds"], default=None, help="Build the networks with one OpenMaya modifier or with maya.cmds")
+    parser.add_argument("--dry-run", action="store_true", help="Only work out the networks and print them, Maya isn't needed")
+    parser.add_argument("--save-plans", default=None, help="Writes the worked out networks to a JSON file")
+    parser.add_argument("--templates", action="store_true", help="Clone shaders with the same layout from the first one built, only their files and names are set")
+    parser.add_argument("--scene", default=None, help="Opens this scene first, so --update can change the shaders in it")
+    parser.add_argument("--update", action="store_true", help="Change the networks of shaders already in the scene to match, instead of making a second shader")
+    parser.add_argument("--assign", action="store_true", help="Assign every shader to the meshes named like its texture set or shader, use with --scene")
+    parser.add_argument("--no-reuse", action="store_true", help="Always make new file nodes, even for textures already loaded in the scene")
+    parser.add_argument("--dedup", action="store_true", help="Point identical images saved under different names at one copy, so they are loaded once")
+    parser.add_argument("--no-probe", action="store_true", help="Don't read the image headers, use the color spaces from the JSON")
+    parser.add_argument("--tx", action="store_true", help="Convert the textures to .tx and use those")
+    parser.add_argument("--maketx", default=None, help="Converter executable used by --tx, maketx from Arnold by default")
+    parser.add_argument("--no-cache", action="store_true", help="Don't use or update the scan cache")
+    parser.add_argument("--clear-cache", action="store_true", help="Forget the scan cache before starting")
+    parser.add_argument("--config", default=None, help="Path to a different JSON config")
+    parser.add_argument("--timing-log", default=None, help="Appends the phase times and Maya command counts as a JSON line to this file")
+    parser.add_argument("--output", default=None, help="Saves the scene to this file when done")
+    args = parser.parse_args(argv)
+
+    if args.timing_log:
+        timing.log_path = args.timing_log
+
+    shader_config = core.get_shader_config(args.config)
+
+    if args.manifests:
+        folders = []
+    elif args.folders:
+        folders = args.paths
+    else:
+        folders = []
+        for library_root in args.paths:
+            folders.extend(find_asset_folders(library_root, nested=not args.recursive))
+
+    scan_cache = None
+    if not args.no_cache and not args.manifests:
+        scan_cache = cache.ScanCache(shader_config.matcher)
+        if args.clear_cache:
+            scan_cache.invalidate()
+
+    if args.dry_run:
+        warn = network.raise_warning
+        color_spaces = None
+    else:
+        cmds = start_standalone(args.scene)
+        warn = cmds.warning
+        color_spaces = network.color_spaces()
+
+    if args.manifests:
+        #Everything was resolved when the manifests were written, the texture directories aren't scanned
+        materials = manifest.load_manifests(args.paths, shader_config, warn)
+        if args.check:
+            for msg in manifest.check_manifests(materials):
+                warn(msg)
+        plans = list(zip([material.get("folder") for material in materials], manifest.plan_manifest(materials)))
+        source = f"{len(args.paths)} manifests"
+    else:
+        materials = [] if args.save_manifest else None
+        hash_cache = cache.HashCache() if args.dedup else None
+        if hash_cache is not None and args.clear_cache:
+            hash_cache.invalidate()
+        plans = plan_materials(folders, shader_config, args.normal, warn, args.recursive, args.max_depth, scan_cache,
+                               not args.separate_placement, not args.no_probe, color_spaces, args.tx, args.maketx,
+                               args.texture_sets, materials, hash_cache)
+        source = f"{len(folders)} folders"
+
+        if hash_cache is not None:
+            hash_cache.save()
+
+    if scan_cache is not None:
+        scan_cache.save()
+
+    if args.save_manifest:
+        manifest.write_manifest(args.save_manifest, materials, shader_config)
+
+    if args.save_plans:
+        with open(args.save_plans, 'w') as plans_file:
+            json.dump([dict(plan.to_dict(), folder=folder) for folder, plan in plans], plans_file, indent=1)
+
+    if args.dry_run:
+        for folder, plan in plans:
+            stats = plan.stats()
+            print(f"{plan.shader_name}: {stats['nodes']} nodes, {stats['attrs']} attributes, {stats['edges']} connections ({folder})")
+        print(f"Planned {len(plans)} shaders from {source}")
+        timing.note(folders=len(folders), shaders=len(plans))
+        print(timing.current().summary())
+        return 0
+
+    index = None if args.no_reuse else network.file_index()
+    results = execute_materials(plans, args.backend, warn, index, network.scene_templates if args.templates else None, args.update)
+    print(f"Created {len(plans)} shaders from {source}")
+    if args.assign:
+        assignments = assign_results(results, shader_config.matcher, warn)
+        print(f"Assigned {len(assignments)} shaders to {sum(len(meshes) for meshes in assignments.values())} meshes")
+    timing.note(folders=len(folders), shaders=len(plans))
+    print(timing.current().summary())
+
+    finish_standalone(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
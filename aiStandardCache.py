@@ -0,0 +1,225 @@
+#Jaroslav Lajta
+
+import os
+import json
+import threading
+from collections import OrderedDict
+
+import aiStandardCore as core
+
+
+CACHE_VERSION = 1
+
+#Every folder counts, so subfolders of a recursive scan take their own place
+MAX_CACHED_FOLDERS = 512
+
+#Content hashes kept for files, one entry per file
+MAX_CACHED_HASHES = 200000
+
+
+def cache_directory() -> str:
+    """
+    Returns the folder where the caches are saved
+    """
+    return os.path.join(os.path.expanduser("~"), ".aiStandardScript")
+
+
+class JsonCache:
+    """
+    Entries kept in memory and in a JSON file under ENTRIES_KEY, in the order they were last used
+    The least recently used entries are dropped once there are more than max_entries
+    """
+
+    ENTRIES_KEY = "entries"
+
+    def __init__(self, cache_path: str, max_entries: int):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.load()
+
+    def signature(self):
+        """
+        Returns what the entries were worked out with, a file saved with another signature is ignored
+        """
+        return None
+
+    def load(self):
+        """
+        Reads the cache file, it is ignored if it was made by a different version or with a different signature
+        """
+        try:
+            with open(self.cache_path, 'r') as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != CACHE_VERSION or data.get("config") != self.signature():
+            return
+
+        with self.lock:
+            self.entries = OrderedDict(data.get(self.ENTRIES_KEY, []))
+            self.evict()
+
+    def save(self):
+        """
+        Writes the cache file, see core.write_json
+        """
+        with self.lock:
+            data = {"version": CACHE_VERSION}
+            if self.signature() is not None:
+                data["config"] = self.signature()
+            data[self.ENTRIES_KEY] = list(self.entries.items())
+
+        core.write_json(self.cache_path, data)
+
+    def evict(self):
+        """
+        Drops the least recently used entries over the limit, the lock has to be held
+        """
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class ScanCache(JsonCache):
+    """
+    Remembers the listing and classification of folders, on disk and in memory
+    A folder is only listed again when its mtime changed, then only the files whose size or mtime changed are classified again
+    The least recently used folders are dropped once there are more than max_folders
+    """
+
+    ENTRIES_KEY = "folders"
+
+    def __init__(self, matcher: core.TextureMatcher, cache_path: str = None, max_folders: int = MAX_CACHED_FOLDERS):
+        self.matcher = matcher
+        super().__init__(cache_path if cache_path is not None else os.path.join(cache_directory(), "scan_cache.json"), max_folders)
+
+    def signature(self):
+        return self.matcher.signature()
+
+    def invalidate(self, folder_directory: str = None):
+        """
+        Forgets a folder and everything under it, or the whole cache when no folder is given
+        """
+        with self.lock:
+            if folder_directory is None:
+                self.entries.clear()
+                return
+
+            folder_directory = folder_directory.rstrip("/")
+            for cached_folder in list(self.entries):
+                if cached_folder == folder_directory or cached_folder.startswith(f"{folder_directory}/"):
+                    del self.entries[cached_folder]
+
+    def cached_folders(self, folder_directory: str) -> list:
+        """
+        Returns the folder and the folders under it that are in the cache
+        """
+        folder_directory = folder_directory.rstrip("/")
+        with self.lock:
+            return [cached_folder for cached_folder in self.entries
+                    if cached_folder == folder_directory or cached_folder.startswith(f"{folder_directory}/")]
+
+    def scan_folder(self, folder_directory: str):
+        """
+        Same as core.scan_folder but served from the cache while the folder mtime is the same
+        """
+        folder_directory = folder_directory.rstrip("/")
+        folder_mtime = os.stat(folder_directory).st_mtime_ns
+
+        with self.lock:
+            entry = self.entries.get(folder_directory)
+            if entry is not None:
+                self.entries.move_to_end(folder_directory)
+
+        if entry is None or entry["mtime"] != folder_mtime:
+            entry = self.refresh(folder_directory, folder_mtime, entry)
+
+        files = [f'{folder_directory}/{name}' for name in entry["files"]]
+        sub_folders = [f'{folder_directory}/{name}' for name in entry["folders"]]
+        return files, sub_folders
+
+    def refresh(self, folder_directory: str, folder_mtime: int, old_entry: dict) -> dict:
+        """
+        Lists a changed folder again, files with the same size and mtime keep their classification
+        """
+        old_files = old_entry["files"] if old_entry is not None else {}
+        files = {}
+        sub_folders = []
+
+        with os.scandir(folder_directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    previous = old_files.get(entry.name)
+                    if previous is not None and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+                        files[entry.name] = previous
+                    else:
+                        files[entry.name] = [stat.st_size, stat.st_mtime_ns, self.matcher.match(entry.name)]
+                elif entry.is_dir():
+                    sub_folders.append(entry.name)
+
+        new_entry = {"mtime": folder_mtime, "files": files, "folders": sub_folders}
+
+        with self.lock:
+            self.entries[folder_directory] = new_entry
+            self.entries.move_to_end(folder_directory)
+            self.evict()
+
+        return new_entry
+
+    def matches(self, all_files) -> dict:
+        """
+        Returns the cached texture types of the files
+        """
+        matches = {}
+
+        with self.lock:
+            for filepath in all_files:
+                folder_directory, _, name = filepath.rpartition("/")
+                entry = self.entries.get(folder_directory)
+                if entry is not None and name in entry["files"]:
+                    matches[filepath] = entry["files"][name][2]
+
+        return matches
+
+
+class HashCache(JsonCache):
+    """
+    Remembers the content hash of files, on disk and in memory
+    A hash is used again while the size and mtime of its file are the same
+    The least recently used files are dropped once there are more than max_files
+    """
+
+    ENTRIES_KEY = "files"
+
+    def __init__(self, cache_path: str = None, max_files: int = MAX_CACHED_HASHES):
+        super().__init__(cache_path if cache_path is not None else os.path.join(cache_directory(), "hash_cache.json"), max_files)
+
+    def invalidate(self):
+        """
+        Forgets every hash
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def get(self, filepath: str, size: int, mtime: int) -> str:
+        """
+        Returns the remembered hash of a file, None when it isn't known or the file changed
+        """
+        with self.lock:
+            entry = self.entries.get(filepath)
+            if entry is None or entry[0] != size or entry[1] != mtime:
+                return None
+            self.entries.move_to_end(filepath)
+            return entry[2]
+
+    def put(self, filepath: str, size: int, mtime: int, content_hash: str):
+        """
+        Remembers the hash of a file
+        """
+        with self.lock:
+            self.entries[filepath] = [size, mtime, content_hash]
+            self.entries.move_to_end(filepath)
+            self.evict()
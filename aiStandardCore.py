@@ -0,0 +1,717 @@
+#Jaroslav Lajta
+
+import os
+import re
+import json
+import time
+import hashlib
+from collections import namedtuple, Counter
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import aiStandardTiming as timing
+
+
+CONFIG_FILENAME = 'ai_standard_surface_shader_config.json'
+
+#Supported all file formats as in https://help.autodesk.com/view/MAYAUL/2024/ENU/?guid=GUID-BF7C7484-C7F6-48C6-9092-7E6EB373B312
+FILE_FORMATS = ["psd","als","avi","dds","gif","jpg","cin","iff","jpeg","exr","png","eps","yuv","pic","hdr","sgi","tim","tga","tif","rla","bmp","xpm"]
+
+#Threads used for file server requests, listing folders, reading headers and checking files, they mostly wait
+IO_WORKERS = 16
+
+#Tiled textures, the tile number has to sit right before the extension
+UDIM_PATTERN = re.compile(r'(?<=[._])(1[0-9]{3})(?=\.[^./]+$)')
+#A UDIM between dots is always a tile, after an underscore it could be a resolution like _1024
+DOTTED_UDIM_PATTERN = re.compile(r'\.1[0-9]{3}(?=\.[^./]+$)')
+UV_TILE_PATTERN = re.compile(r'(?<=[._])[uU]([0-9]+)_[vV]([0-9]+)(?=\.[^./]+$)')
+
+#uvTilingMode values of the file node
+TILING_ZBRUSH = 1
+TILING_MUDBOX = 2
+TILING_UDIM = 3
+
+#Normal map variants in the order they are picked when nobody chooses one
+NORMAL_TYPES = ["OpenGL", "DirectX", "Undefined"]
+
+#Keys every texture of the config needs and their types
+TEXTURE_KEYS = {"colorSpace": str, "connectType": str, "enableAlphaIsLuminance": bool}
+
+#connectType of the packed layouts
+PACKED_CONNECT_TYPE = "packed"
+
+#Channels a packed texture can spread over shader inputs
+PACKED_CHANNELS = ("R", "G", "B", "A")
+
+#Texture types that drive more than one attribute and can't come from a channel
+UNPACKABLE_TYPES = ("normal", "bump", "height")
+
+#Settings of one texture type, read from the config
+#channels is set for packed layouts, the texture type each channel drives
+TextureRule = namedtuple("TextureRule", ["color_space", "connect_type", "alpha_is_luminance", "share_placement", "aliases",
+                                         "channels"], defaults=(None,))
+
+#Compiled configs by path, each remembers the modification time it was read at
+compiled_configs = {}
+
+
+def config_path() -> str:
+    """
+    Returns the path of the JSON config that sits next to the scripts
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, CONFIG_FILENAME)
+
+
+def load_shader_config(json_filepath: str = None) -> dict:
+    """
+    Loads the Json file with all the names and colorspaces
+    Raises OSError or ValueError if the file is missing or broken
+    """
+    if json_filepath is None:
+        json_filepath = config_path()
+
+    with open(json_filepath, 'r') as json_file:
+        return json.load(json_file)
+
+
+def validate_shader_config(shader_config) -> list:
+    """
+    Checks the config has everything the textures need
+    Returns the problems found, an empty list when the config is fine
+    """
+    if not isinstance(shader_config, dict) or not isinstance(shader_config.get("textures"), dict):
+        return ["there is no \"textures\" dictionary"]
+
+    problems = []
+    for texture_type, data in shader_config["textures"].items():
+        if not isinstance(data, dict):
+            problems.append(f"{texture_type} isn't a dictionary")
+            continue
+
+        for key, key_type in TEXTURE_KEYS.items():
+            if not isinstance(data.get(key), key_type):
+                problems.append(f"{texture_type} needs {key} as {key_type.__name__}")
+
+        if not isinstance(data.get("sharePlacement", True), bool):
+            problems.append(f"{texture_type} needs sharePlacement as bool")
+        aliases = data.get("aliases", [])
+        if not isinstance(aliases, list) or not all(isinstance(alias, str) for alias in aliases):
+            problems.append(f"{texture_type} needs aliases as a list of names")
+
+    packed = shader_config.get("packed", {})
+    if not isinstance(packed, dict):
+        return problems + ["\"packed\" isn't a dictionary"]
+
+    textures = shader_config["textures"]
+    for layout, data in packed.items():
+        if layout in textures:
+            problems.append(f"packed layout {layout} has the name of a texture type")
+        if not isinstance(data, dict):
+            problems.append(f"packed layout {layout} isn't a dictionary")
+            continue
+
+        if not isinstance(data.get("colorSpace"), str):
+            problems.append(f"packed layout {layout} needs colorSpace as str")
+        if not isinstance(data.get("sharePlacement", True), bool):
+            problems.append(f"packed layout {layout} needs sharePlacement as bool")
+        aliases = data.get("aliases", [])
+        if not isinstance(aliases, list) or not all(isinstance(alias, str) for alias in aliases):
+            problems.append(f"packed layout {layout} needs aliases as a list of names")
+
+        channels = data.get("channels")
+        if not isinstance(channels, dict) or not channels:
+            problems.append(f"packed layout {layout} needs channels as a dictionary")
+            continue
+        for channel, texture_type in channels.items():
+            if channel not in PACKED_CHANNELS:
+                problems.append(f"packed layout {layout} has an unknown channel {channel}")
+            #null leaves a channel unused, like occlusion that aiStandardSurface has no input for
+            elif texture_type is None:
+                continue
+            elif texture_type not in textures or texture_type in UNPACKABLE_TYPES:
+                problems.append(f"packed layout {layout} can't put {texture_type} in channel {channel}")
+            elif str(textures[texture_type].get("connectType", "")).lower() == "color":
+                problems.append(f"packed layout {layout} can't put the color {texture_type} in channel {channel}")
+
+    return problems
+
+
+class TextureMatcher:
+    """
+    Token index compiled once from the config
+    Maps every texture type and alias to its texture type so a file is classified with one pass over its tokens
+    Packed layouts like ORM are in the index too, but a name with a plain texture type is never a packed texture
+    """
+
+    #Splits on underscores, hyphens, dots and spaces
+    SEPARATORS = re.compile(r'[_\-. ]+')
+    #Splits camelCase words and numbers
+    WORDS = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+    def __init__(self, shader_config: dict):
+        self.index = {}
+        #First words of the names that are longer than one word
+        self.prefixes = set()
+        self.max_words = 1
+
+        for texture_type, data in shader_config["textures"].items():
+            self.add_token(texture_type, texture_type)
+
+        #Aliases never replace real texture type names
+        for texture_type, data in shader_config["textures"].items():
+            for alias in data.get("aliases", []):
+                if self.key(alias) not in self.index:
+                    self.add_token(alias, texture_type)
+
+        #Packed layouts never replace texture types or their aliases
+        self.packed = set()
+        for layout, data in shader_config.get("packed", {}).items():
+            for name in [layout] + data.get("aliases", []):
+                if self.key(name) not in self.index:
+                    self.add_token(name, layout)
+                    self.packed.add(layout)
+
+    def key(self, name: str) -> str:
+        """
+        Returns the lookup key of a name, all the words joined in lowercase
+        """
+        return "".join(self.WORDS.findall(name)).lower()
+
+    def add_token(self, name: str, texture_type: str):
+        """
+        Adds a name to the index
+        """
+        words = [word.lower() for word in self.WORDS.findall(name)]
+        self.index["".join(words)] = texture_type
+
+        if len(words) > 1:
+            self.prefixes.add(words[0])
+            self.max_words = max(self.max_words, len(words))
+
+    def signature(self) -> str:
+        """
+        Returns a short hash of the index, it changes whenever the names or aliases in the config change
+        """
+        return hashlib.sha1(json.dumps(sorted(self.index.items())).encode()).hexdigest()[:16]
+
+    def tokenize(self, filename: str, lower: bool = True) -> list:
+        """
+        Splits a filename without extension into lowercase words
+        With lower off the words keep their case, the split is the same
+        """
+        words = []
+        for part in self.SEPARATORS.split(filename):
+            if part.islower():
+                words.append(part)
+            elif lower:
+                words.extend(word.lower() for word in self.WORDS.findall(part))
+            else:
+                words.extend(self.WORDS.findall(part))
+        return words
+
+    def match(self, filename: str) -> list:
+        """
+        Returns the texture types found in a filename in the order they appear
+        The longest run of words that is in the index wins, so base_color is baseColor and not base
+        """
+        found = self.find(self.tokenize(os.path.splitext(filename)[0]))
+        if self.packed and len(found) > 1:
+            found = self.drop_packed(found)
+        return found
+
+    def texture_set(self, filename: str) -> str:
+        """
+        Returns the texture set of a filename, the words before its first texture type
+        Body_BaseColor.png is in the set Body, a file without a prefix is in the set ""
+        """
+        words = self.tokenize(os.path.splitext(filename)[0], lower=False)
+        found = self.find([word.lower() for word in words], positions=True)
+        if self.packed and len(found) > 1:
+            found = self.drop_packed(found, positions=True)
+        if not found:
+            return ""
+        return "_".join(words[:found[0][0]])
+
+    def drop_packed(self, found: list, positions: bool = False) -> list:
+        """
+        Leaves the packed layouts out when a plain texture type was found too, Arm_BaseColor is a base color and not an ARM map
+        Of several packed layouts only the last one is kept, they end the name like Arm_ORM
+        """
+        is_packed = [(item[1] if positions else item) in self.packed for item in found]
+        if not any(is_packed):
+            return found
+        if not all(is_packed):
+            return [item for item, packed in zip(found, is_packed) if not packed]
+        return found[-1:]
+
+    def find(self, words: list, positions: bool = False) -> list:
+        """
+        Returns the texture types found in lowercase words
+        With positions every texture type comes with the index of its first word
+        """
+        index = self.index
+        found = []
+        i = 0
+        count = len(words)
+
+        while i < count:
+            word = words[i]
+            length = 1
+
+            if word in self.prefixes:
+                for length in range(min(self.max_words, count - i), 0, -1):
+                    if "".join(words[i:i + length]) in index:
+                        word = "".join(words[i:i + length])
+                        break
+
+            texture_type = index.get(word)
+            if texture_type is not None:
+                found.append((i, texture_type) if positions else texture_type)
+            i += length
+
+        return found
+
+
+class ShaderConfig:
+    """
+    The JSON config checked once and compiled into read-only texture rules and the token index
+    """
+
+    def __init__(self, shader_config: dict, json_filepath: str = None, mtime: int = None):
+        problems = validate_shader_config(shader_config)
+        if problems:
+            raise ValueError(f"{json_filepath or 'The shader config'} isn't valid: {', '.join(problems)}")
+
+        self.path = json_filepath
+        self.mtime = mtime
+        textures = {
+            texture_type: TextureRule(data["colorSpace"], data["connectType"], data["enableAlphaIsLuminance"],
+                                      data.get("sharePlacement", True), tuple(data.get("aliases", [])))
+            for texture_type, data in shader_config["textures"].items()
+        }
+        #Packed layouts are classified like texture types, their channels say which inputs they drive
+        for layout, data in shader_config.get("packed", {}).items():
+            textures[layout] = TextureRule(data["colorSpace"], PACKED_CONNECT_TYPE, False, data.get("sharePlacement", True),
+                                           tuple(data.get("aliases", [])), MappingProxyType(dict(data["channels"])))
+        self.textures = MappingProxyType(textures)
+        self.matcher = TextureMatcher(shader_config)
+        self.signature = self.matcher.signature()
+
+
+def get_shader_config(json_filepath: str = None) -> ShaderConfig:
+    """
+    Returns the compiled config, the file is read and checked only the first time and again after it changes
+    Raises OSError or ValueError if the file is missing, broken or not valid
+    """
+    if json_filepath is None:
+        json_filepath = config_path()
+    json_filepath = os.path.abspath(json_filepath)
+
+    mtime = os.stat(json_filepath).st_mtime_ns
+    compiled = compiled_configs.get(json_filepath)
+    if compiled is None or compiled.mtime != mtime:
+        compiled = ShaderConfig(load_shader_config(json_filepath), json_filepath, mtime)
+        compiled_configs[json_filepath] = compiled
+
+    return compiled
+
+
+def tile_info(filepath: str):
+    """
+    Finds the tile number of a tiled texture
+    Returns the path with the tile replaced by a token, the uvTilingMode and the tile, or None for a normal texture
+    UV tiles always get the 1-based Mudbox tokens here, group_tiles switches them when a tile starts from 0
+    """
+    match = UDIM_PATTERN.search(filepath)
+    if match is not None:
+        return f"{filepath[:match.start()]}<UDIM>{filepath[match.end():]}", TILING_UDIM, int(match.group(1))
+
+    match = UV_TILE_PATTERN.search(filepath)
+    if match is not None:
+        return f"{filepath[:match.start()]}u<U>_v<V>{filepath[match.end():]}", TILING_MUDBOX, (int(match.group(1)), int(match.group(2)))
+
+    return None
+
+
+def find_tiles(filepaths) -> dict:
+    """
+    Returns the tile_info of every tiled file
+    A number after an underscore is only a UDIM tile when another file has the same path with another tile,
+    so a lone wood_basecolor_1024.png keeps its path and name.1001.png is always a tile
+    """
+    found = {}
+    for filepath in filepaths:
+        tile = tile_info(filepath)
+        if tile is not None:
+            found[filepath] = tile
+
+    counts = Counter(tile[0] for tile in found.values())
+    return {filepath: tile for filepath, tile in found.items()
+            if tile[1] != TILING_UDIM or counts[tile[0]] > 1 or DOTTED_UDIM_PATTERN.search(filepath)}
+
+
+def texture_entries(texture_maps: dict) -> list:
+    """
+    Returns (texture type, details) for every texture file, each normal map variant is its own entry
+    """
+    entries = []
+    for texture_type, details in texture_maps.items():
+        if texture_type == "normal":
+            entries.extend((texture_type, normal_details) for normal_details in details.values() if isinstance(normal_details, dict))
+        else:
+            entries.append((texture_type, details))
+    return entries
+
+
+def group_tiles(texture_maps: dict, tiles: dict):
+    """
+    Gives the texture maps that point at a tiled path their uvTilingMode and the list of tile files
+    UV tiles that start from 0 are switched to the 0-based ZBrush tokens
+    """
+    for texture_type, details in texture_entries(texture_maps):
+        tile_set = tiles.get(details["filePath"])
+        if tile_set is None:
+            continue
+
+        tiling_mode, tile_files = tile_set
+        details["uvTilingMode"] = tiling_mode
+        details["tiles"] = sorted(tile_files)
+
+        if tiling_mode == TILING_MUDBOX and any(0 in tile_info(tile)[2] for tile in tile_files):
+            details["uvTilingMode"] = TILING_ZBRUSH
+            details["filePath"] = details["filePath"].replace("u<U>_v<V>", "u<u>_v<v>")
+
+
+def texture_entry(filepath: str, rule: TextureRule) -> dict:
+    """
+    Makes the dictionary that describes one texture file
+    """
+    entry = {
+        "filePath": filepath,
+        "colorSpace": rule.color_space,
+        "connectType": rule.connect_type,
+        "enableAlphaIsLuminance": rule.alpha_is_luminance,
+        "sharePlacement": rule.share_placement,
+    }
+    if rule.channels is not None:
+        entry["channels"] = dict(rule.channels)
+    return entry
+
+
+def write_json(path: str, data):
+    """
+    Writes data to a JSON file, replacing the old file at once so a crash can't leave half a file
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as json_file:
+        json.dump(data, json_file)
+    os.replace(temp_path, path)
+
+
+def image_extensions(file_format=FILE_FORMATS) -> frozenset:
+    """
+    Returns the accepted extensions as a set for quick lookups
+    """
+    return frozenset(file_type.lower() for file_type in file_format)
+
+
+def scan_folder(folder_directory: str):
+    """
+    Lists one directory with scandir, the entry types come with the listing so no file is stat'ed
+    Returns the files and the subdirectories
+    """
+    files = []
+    sub_folders = []
+
+    with os.scandir(folder_directory) as entries:
+        for entry in entries:
+            path = f'{folder_directory}/{entry.name}'
+            if entry.is_file():
+                files.append(path)
+            elif entry.is_dir():
+                sub_folders.append(path)
+
+    return files, sub_folders
+
+
+def iter_scan(folder_directory: str, recursive: bool = False, max_depth: int = None, workers: int = IO_WORKERS,
+              lister=scan_folder, cancelled=None):
+    """
+    Lists a directory and hands out the files of every folder as soon as it is listed
+    With recursive the subdirectories are listed too, a level at a time across a thread pool
+    max_depth limits how many levels of subdirectories are entered, None means no limit
+    lister lists a single folder, it is swapped for the cached one by the scan cache
+    cancelled is asked between folders, the scan stops as soon as it returns True
+    """
+    files, sub_folders = lister(folder_directory)
+    yield files
+
+    if not recursive:
+        return
+
+    depth = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while sub_folders and (max_depth is None or depth < max_depth):
+            depth += 1
+            next_folders = []
+            futures = [executor.submit(lister, folder) for folder in sub_folders]
+            try:
+                for future in as_completed(futures):
+                    if cancelled is not None and cancelled():
+                        return
+                    files, folders = future.result()
+                    next_folders.extend(folders)
+                    yield files
+            finally:
+                for future in futures:
+                    future.cancel()
+            sub_folders = next_folders
+
+
+def scan_directory(folder_directory: str, recursive: bool = False, max_depth: int = None, workers: int = IO_WORKERS,
+                   lister=scan_folder) -> list:
+    """
+    Returns all the files inside a directory, see iter_scan
+    """
+    return sorted(file for files in iter_scan(folder_directory, recursive, max_depth, workers, lister) for file in files)
+
+
+def classify_files(all_files, shader_config: ShaderConfig, file_format=FILE_FORMATS, matcher: TextureMatcher = None,
+                   matches: dict = None):
+    """
+    Filters the files and sorts them into a dictionary keyed by texture type
+    Returns the texture maps and a list of warnings for the files that were skipped
+    matcher replaces the token index of the config, matches holds texture types already found for some files
+    """
+    texture_sets, warnings = classify_texture_sets(all_files, shader_config, file_format, matcher, matches, split_sets=False)
+    return texture_sets.get("", {}), warnings
+
+
+def classify_texture_sets(all_files, shader_config: ShaderConfig, file_format=FILE_FORMATS, matcher: TextureMatcher = None,
+                          matches: dict = None, split_sets: bool = True):
+    """
+    Sorts the files into texture sets in one pass, Body_BaseColor and Head_BaseColor end up in the sets Body and Head
+    Returns the texture maps of every set by set name and a list of warnings for the files that were skipped
+    Set names are matched without case, the first spelling found names the set
+    With split_sets off every file is in the set ""
+    """
+    texture_sets = {}
+    set_names = {}
+    warnings = []
+    all_files = set(all_files)
+    only_images = set()
+    all_images = set()
+
+    # Keep only files with chosen extensions
+    extensions = image_extensions(file_format)
+    for file in all_files:
+        if file.rpartition('.')[2].lower() in extensions:
+            only_images.add(file)
+
+    # Just to show files that aren't images
+    non_images = all_files.difference(only_images)
+
+    for file in non_images:
+        warnings.append(f"{os.path.basename(file)} doesn't have an acceptable extension!")
+
+    config = shader_config.textures
+
+    if matcher is None:
+        matcher = shader_config.matcher
+    if matches is None:
+        matches = {}
+
+    #Tiled path -> uvTilingMode and the files of the tiles
+    tiles = {}
+    tiled_files = find_tiles(only_images)
+
+    for filepath in sorted(only_images):
+        filename = os.path.basename(filepath)
+        texture_types = matches.get(filepath)
+        if texture_types is None:
+            texture_types = matcher.match(filename)
+        if not texture_types:
+            continue
+
+        set_name = matcher.texture_set(filename) if split_sets else ""
+        set_name = set_names.setdefault(set_name.lower(), set_name)
+        texture_maps = texture_sets.setdefault(set_name, {})
+
+        #All the tiles of a texture end up as one entry with the tiled path
+        texture_path = filepath
+        tile = tiled_files.get(filepath)
+        if tile is not None:
+            texture_path = tile[0]
+            tiles.setdefault(texture_path, (tile[1], []))[1].append(filepath)
+
+        for texture_type in texture_types:
+            rule = config[texture_type]
+            all_images.add(filepath)
+
+            if texture_type == "normal":
+                texture_maps[texture_type] = texture_maps.get(texture_type, {})
+
+                if "directx" in filename.lower():
+                    texture_maps[texture_type]["DirectX"] = texture_entry(texture_path, rule)
+                elif "opengl" in filename.lower():
+                    texture_maps[texture_type]["OpenGL"] = texture_entry(texture_path, rule)
+                else:
+                    texture_maps[texture_type]["Undefined"] = texture_entry(texture_path, rule)
+            else:
+                texture_maps[texture_type] = texture_entry(texture_path, rule)
+
+    for texture_maps in texture_sets.values():
+        group_tiles(texture_maps, tiles)
+
+    not_usable_images = only_images.difference(all_images)
+
+    for file in not_usable_images:
+        warnings.append(f"{os.path.basename(file)} are not usable for the Shader!")
+
+    return texture_sets, warnings
+
+
+def load_texture_maps(folder_directory: str, shader_config: ShaderConfig, file_format=FILE_FORMATS, matcher: TextureMatcher = None,
+                      recursive: bool = False, max_depth: int = None, cache=None, split_sets: bool = False):
+    """
+    Loads all the respectable files of a directory, filters and saves them to a dictionary
+    With a ScanCache unchanged folders are not listed again and their files are not classified again
+    Returns the texture maps and a list of warnings
+    With split_sets the texture maps of every texture set are returned by set name instead
+    """
+    with timing.phase("scan"):
+        if cache is None:
+            all_files = scan_directory(folder_directory, recursive, max_depth)
+        else:
+            all_files = scan_directory(folder_directory, recursive, max_depth, lister=cache.scan_folder)
+
+    with timing.phase("classify"):
+        matches = cache.matches(all_files) if cache is not None else None
+        if split_sets:
+            return classify_texture_sets(all_files, shader_config, file_format, matcher, matches)
+        return classify_files(all_files, shader_config, file_format, matcher, matches)
+
+
+def iter_texture_maps(folder_directory: str, shader_config: ShaderConfig, file_format=FILE_FORMATS, matcher: TextureMatcher = None,
+                      recursive: bool = False, max_depth: int = None, cache=None, cancelled=None, interval: float = 0.25,
+                      split_sets: bool = False):
+    """
+    Loads the texture maps like load_texture_maps, but hands out what was found so far while the scan goes on
+    Yields (texture maps, warnings, folders listed, files found) at most every interval seconds, the last one has everything
+    Nothing more is yielded once cancelled returns True
+    With split_sets the texture sets by set name are yielded in place of the texture maps
+    """
+    classify_found = classify_texture_sets if split_sets else classify_files
+    lister = cache.scan_folder if cache is not None else scan_folder
+    all_files = []
+    folders = 0
+    shown = time.perf_counter()
+
+    def classify():
+        matches = cache.matches(all_files) if cache is not None else None
+        texture_maps, warnings = classify_found(all_files, shader_config, file_format, matcher, matches)
+        return texture_maps, warnings, folders, len(all_files)
+
+    scan = iter_scan(folder_directory, recursive, max_depth, lister=lister, cancelled=cancelled)
+    while True:
+        with timing.phase("scan"):
+            files = next(scan, None)
+        if files is None:
+            break
+
+        all_files.extend(files)
+        folders += 1
+
+        if time.perf_counter() - shown >= interval:
+            with timing.phase("classify"):
+                found = classify()
+            yield found
+            shown = time.perf_counter()
+
+    if cancelled is not None and cancelled():
+        return
+
+    with timing.phase("classify"):
+        found = classify()
+    yield found
+
+
+def merge_texture_maps(old_maps: dict, new_maps: dict) -> dict:
+    """
+    Takes the newly found texture maps but keeps the old details of every texture whose files are the same
+    So color spaces chosen by hand survive a rescan
+    """
+    def same_files(old_details, new_details) -> bool:
+        return (isinstance(old_details, dict) and old_details.get("filePath") == new_details["filePath"]
+                and old_details.get("tiles") == new_details.get("tiles"))
+
+    merged = {}
+    for texture_type, details in new_maps.items():
+        old_details = old_maps.get(texture_type, {})
+        if texture_type == "normal":
+            merged[texture_type] = {}
+            for normal_type, normal_details in details.items():
+                old_normal = old_details.get(normal_type)
+                merged[texture_type][normal_type] = old_normal if same_files(old_normal, normal_details) else normal_details
+        else:
+            merged[texture_type] = old_details if same_files(old_details, details) else details
+    return merged
+
+
+def pick_normal_type(normal_maps: dict, normal_type: str = None) -> str:
+    """
+    Returns which normal map variant should be used
+    The requested one if it was found, otherwise the first one found from NORMAL_TYPES
+    """
+    if normal_type in normal_maps:
+        return normal_type
+
+    for found_type in NORMAL_TYPES:
+        if found_type in normal_maps:
+            return found_type
+
+    return None
+
+
+def normalize_path(filepath: str) -> str:
+    """
+    Returns a path in one form, so the same file written in different ways compares equal
+    """
+    return os.path.normcase(os.path.normpath(os.path.expandvars(filepath))).replace("\\", "/")
+
+
+def shader_name_from_folder(folder_directory: str) -> str:
+    """
+    Makes a valid Maya node name out of the folder name
+    """
+    return valid_node_name(os.path.basename(os.path.normpath(folder_directory)))
+
+
+def shader_name_for_set(base_name: str, set_name: str) -> str:
+    """
+    Makes the shader name of a texture set, the set name after the base name
+    The set without a prefix keeps the base name
+    """
+    if not set_name:
+        return valid_node_name(base_name)
+    if not base_name:
+        return valid_node_name(set_name)
+    return valid_node_name(f"{base_name}_{set_name}")
+
+
+def valid_node_name(name: str) -> str:
+    """
+    Makes a valid Maya node name out of any text
+    """
+    name = "".join(char if char.isalnum() else "_" for char in name).strip("_")
+
+    if name == "":
+        name = "standard_surface_shader"
+    elif name[0].isdigit():
+        name = f"_{name}"
+
+    return name
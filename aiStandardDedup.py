@@ -0,0 +1,103 @@
+#Jaroslav Lajta
+
+"""
+Finds byte-identical textures saved under different names, like the same flat normal or white mask in many folders
+Only files that share their size with another one are read, they are hashed from memory-mapped reads on a thread pool
+Every group of identical images is pointed at one canonical path, so it ends up as one file node and one texture in Arnold's cache
+"""
+
+import os
+import mmap
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import aiStandardCore as core
+import aiStandardManifest as manifest
+import aiStandardTiming as timing
+
+
+#Threads used to hash the files, hashing large buffers lets go of the GIL
+HASH_WORKERS = 8
+
+
+def hash_file(filepath: str) -> str:
+    """
+    Returns the content hash of a file read through a memory map, None when it can't be read
+    """
+    try:
+        with open(filepath, 'rb') as image_file:
+            if os.fstat(image_file.fileno()).st_size == 0:
+                return hashlib.blake2b(b"", digest_size=20).hexdigest()
+            with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return hashlib.blake2b(data, digest_size=20).hexdigest()
+    except (OSError, ValueError):
+        return None
+
+
+def find_duplicates(filepaths, hash_cache=None, workers: int = HASH_WORKERS) -> dict:
+    """
+    Returns the canonical path of every file that has an identical copy, the first of the copies in sorted order
+    Files with a size no other file has are never read, with a HashCache files that didn't change aren't read again
+    """
+    filepaths = sorted(set(filepaths))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        stats = dict(zip(filepaths, executor.map(manifest.file_stat, filepaths)))
+
+        by_size = defaultdict(list)
+        for filepath in filepaths:
+            if stats[filepath] is not None:
+                by_size[stats[filepath][0]].append(filepath)
+        candidates = [filepath for same_size in by_size.values() if len(same_size) > 1 for filepath in same_size]
+
+        hashes = {}
+        to_hash = []
+        for filepath in candidates:
+            content_hash = hash_cache.get(filepath, *stats[filepath]) if hash_cache is not None else None
+            if content_hash is None:
+                to_hash.append(filepath)
+            else:
+                hashes[filepath] = content_hash
+
+        for filepath, content_hash in zip(to_hash, executor.map(hash_file, to_hash)):
+            if content_hash is not None:
+                hashes[filepath] = content_hash
+                if hash_cache is not None:
+                    hash_cache.put(filepath, *stats[filepath], content_hash)
+
+    timing.note(hashed=len(to_hash), hashCandidates=len(candidates))
+
+    groups = defaultdict(list)
+    for filepath in candidates:
+        if filepath in hashes:
+            groups[(stats[filepath][0], hashes[filepath])].append(filepath)
+
+    canonical = {}
+    for same_content in groups.values():
+        for filepath in same_content[1:]:
+            canonical[filepath] = same_content[0]
+    return canonical
+
+
+def apply_dedup(all_texture_maps, hash_cache=None, workers: int = HASH_WORKERS) -> int:
+    """
+    Points every texture of the texture maps at the canonical copy of its image, the path it had is kept under "originalPath"
+    all_texture_maps is a list of texture maps, so copies are found across materials too
+    Tiled textures are left alone, their tiles can't be swapped one by one
+    Returns how many textures now share an image with another one
+    """
+    entries = [details for texture_maps in all_texture_maps for texture_type, details in core.texture_entries(texture_maps)
+               if "tiles" not in details]
+
+    with timing.phase("dedup"):
+        canonical = find_duplicates({details["filePath"] for details in entries}, hash_cache, workers)
+
+    shared = 0
+    for details in entries:
+        canonical_path = canonical.get(details["filePath"])
+        if canonical_path is not None:
+            details["originalPath"] = details["filePath"]
+            details["filePath"] = canonical_path
+            shared += 1
+    return shared
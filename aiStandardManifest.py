@@ -0,0 +1,175 @@
+#Jaroslav Lajta
+
+"""
+Writes the resolved materials to a manifest and builds them again from it without scanning the texture directories
+A material keeps its shader name, chosen normal map, placement and every texture with its color space, size and mtime
+The files are only checked against the manifest when asked, with check_manifests
+"""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import aiStandardCore as core
+import aiStandardNetwork as network
+import aiStandardTiming as timing
+
+
+MANIFEST_VERSION = 1
+
+#Details of a texture the manifest keeps, the header info read by the probe is left out
+MANIFEST_KEYS = ("filePath", "colorSpace", "connectType", "enableAlphaIsLuminance", "sharePlacement", "uvTilingMode",
+                 "tiles", "channels")
+
+
+def texture_files(details: dict) -> list:
+    """
+    Returns the files of a texture, every tile of a tiled one
+    """
+    return details.get("tiles") or [details["filePath"]]
+
+
+def file_stat(filepath: str):
+    """
+    Returns the size and mtime of a file, None when it can't be read
+    """
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def manifest_texture(details: dict) -> dict:
+    """
+    Returns the details of one texture as the manifest keeps them, with the size and mtime of its files
+    """
+    entry = {key: details[key] for key in MANIFEST_KEYS if key in details}
+    entry["stat"] = [file_stat(filepath) for filepath in texture_files(details)]
+    return entry
+
+
+def material_entry(shader_name: str, texture_maps: dict, normal_type: str = None, shared_placement: bool = True,
+                   folder: str = None) -> dict:
+    """
+    Resolves one material for the manifest, only the normal map that would be used is kept
+    """
+    textures = {}
+    chosen_normal = None
+
+    for texture_type, details in texture_maps.items():
+        if texture_type == "normal":
+            chosen_normal = core.pick_normal_type(details, normal_type)
+            if chosen_normal is not None:
+                textures[texture_type] = {chosen_normal: manifest_texture(details[chosen_normal])}
+        else:
+            textures[texture_type] = manifest_texture(details)
+
+    return {
+        "shader": shader_name,
+        "folder": folder,
+        "normalType": chosen_normal,
+        "sharedPlacement": shared_placement,
+        "textures": textures,
+    }
+
+
+def write_manifest(manifest_path: str, materials: list, shader_config: core.ShaderConfig = None):
+    """
+    Writes the materials to a manifest, replacing the old file at once so a crash can't leave half a file
+    """
+    if shader_config is None:
+        shader_config = core.get_shader_config()
+
+    data = {
+        "version": MANIFEST_VERSION,
+        "config": shader_config.signature,
+        "materials": materials,
+    }
+
+    core.write_json(manifest_path, data)
+
+
+def read_manifest(manifest_path: str) -> dict:
+    """
+    Reads a manifest
+    Raises OSError or ValueError if the file is missing, broken or from a different version
+    """
+    with open(manifest_path, 'r') as manifest_file:
+        data = json.load(manifest_file)
+
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION or not isinstance(data.get("materials"), list):
+        raise ValueError(f"{manifest_path} isn't a version {MANIFEST_VERSION} manifest")
+    return data
+
+
+def load_manifests(manifest_paths, shader_config: core.ShaderConfig = None, warn=network.raise_warning) -> list:
+    """
+    Reads many manifests and returns all their materials
+    Manifests written with a different config are still used, the choices in them are already resolved
+    """
+    if shader_config is None:
+        shader_config = core.get_shader_config()
+
+    materials = []
+    for manifest_path in manifest_paths:
+        data = read_manifest(manifest_path)
+        if data.get("config") != shader_config.signature:
+            warn(f"{os.path.basename(manifest_path)} was written with a different config, its textures are used as they are")
+        materials.extend(data["materials"])
+    return materials
+
+
+def check_manifests(materials: list, workers: int = core.IO_WORKERS) -> list:
+    """
+    Checks every file of the materials against the size and mtime in the manifest, on a thread pool
+    Returns a warning for every file that is missing or changed since the manifest was written
+    """
+    expected = {}
+    for material in materials:
+        for texture_type, details in core.texture_entries(material["textures"]):
+            for filepath, stat in zip(texture_files(details), details.get("stat", [])):
+                expected[filepath] = (material["shader"], stat)
+
+    filepaths = sorted(expected)
+    with timing.phase("check"):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            found = dict(zip(filepaths, executor.map(file_stat, filepaths)))
+
+    warnings = []
+    for filepath in filepaths:
+        shader_name, stat = expected[filepath]
+        if found[filepath] is None:
+            warnings.append(f"{filepath} of {shader_name} is missing")
+        elif stat is not None and found[filepath] != stat:
+            warnings.append(f"{filepath} of {shader_name} changed since the manifest was written")
+    return warnings
+
+
+def plan_manifest(materials: list) -> list:
+    """
+    Works out the shader network of every material, without touching the texture directories
+    """
+    with timing.phase("plan"):
+        return [network.plan_shader_network(material["shader"], material["textures"], material.get("normalType"),
+                                            material.get("sharedPlacement", True)) for material in materials]
+
+
+@timing.run("build_manifests")
+def build_manifests(manifest_paths, warn=network.raise_warning, backend: str = None, reuse_files: bool = True,
+                    check: bool = False) -> list:
+    """
+    Builds the materials of one or many manifests in one go
+    check compares the files with the manifest first and warns about the ones that are missing or changed
+    Returns the node names of every material
+    """
+    materials = load_manifests(manifest_paths, warn=warn)
+    if check:
+        for msg in check_manifests(materials):
+            warn(msg)
+
+    plans = plan_manifest(materials)
+    index = network.file_index() if reuse_files and backend != "record" else None
+    all_names = network.execute_plans(plans, network.make_builder(backend), warn, index)
+    timing.note(manifests=len(manifest_paths), shaders=len(all_names))
+    return all_names
@@ -0,0 +1,1417 @@
+#Jaroslav Lajta
+
+import os
+import json
+import hashlib
+
+import aiStandardCore as core
+import aiStandardTiming as timing
+
+try:
+    from maya import cmds
+except ImportError:
+    cmds = None
+else:
+    #Every command is counted while a run is timed
+    cmds = timing.CountingCmds(cmds)
+
+#Without OpenMaya the networks are built with maya.cmds
+try:
+    import maya.api.OpenMaya as om
+except ImportError:
+    om = None
+
+
+#All the connections for the place2d node
+PLACE2D_CONNECTIONS = ['rotateUV', 'offset', 'noiseUV', 'vertexCameraOne', 'vertexUvThree',
+                       'vertexUvTwo', 'vertexUvOne', 'repeatUV', 'wrapV', 'wrapU', 'stagger',
+                       'mirrorU', 'mirrorV', 'rotateFrame', 'translateFrame', 'coverage']
+
+#File node output of every channel of a packed texture
+PACKED_OUTPUTS = {"R": "outColorR", "G": "outColorG", "B": "outColorB", "A": "outAlpha"}
+
+#Plugin with the command that makes a modifier undoable
+UNDO_PLUGIN = "aiStandardUndo"
+
+#Modifiers waiting for the undo plugin command to run them
+pending_modifiers = []
+
+#How a network gets built when nothing else is asked for, "api" or "cmds"
+DEFAULT_BACKEND = "api"
+
+#Values attributes go back to when a patched network no longer sets them
+DEFAULT_VALUES = {"uvTilingMode": 0, "alphaIsLuminance": False}
+
+#Input color spaces by the OCIO config they came from
+input_color_spaces = {}
+
+#File nodes of the open scene, made on first use and forgotten when another scene is opened
+scene_file_index = None
+scene_callbacks = []
+
+#File node attributes a clone of a template gets from its own plan, they don't make two layouts differ
+#All of them are set on every clone, Maya can pick another color space by its file rules when the path changes and
+#the template may have been patched since it was built
+TEMPLATE_ATTRS = ("fileTextureName", "colorSpace", "alphaIsLuminance", "uvTilingMode")
+
+#Node types a network of the tool is made of, other nodes connected to it are left alone by an update
+NETWORK_NODE_TYPES = ("file", "place2dTexture", "aiNormalMap", "aiBump2d", "displacementShader")
+
+#Shading group inputs that belong to the network, the members and everything else aren't read
+SHADING_GROUP_INPUTS = ("surfaceShader", "displacementShader")
+
+#Network nodes with no connection to the shader by type, found by their name even when the plan has no place for them
+UNCONNECTED_NODES = {"aiBump2d": "{shader}_bump"}
+
+
+def free_name(name: str, exists) -> str:
+    """
+    Returns the name Maya would give a new node, adding a number while exists says the name is taken
+    """
+    candidate = name
+    number = 1
+    while exists(candidate):
+        candidate = f"{name}{number}"
+        number += 1
+    return candidate
+
+
+def raise_warning(msg: str):
+    """
+    Raises a warning inside maya, or prints it when there is no maya
+    """
+    if cmds is None:
+        print(f"Warning: {msg}")
+    else:
+        cmds.warning(msg)
+
+
+def color_spaces() -> list:
+    """
+    Returns the input color spaces Maya knows, they are asked for only once per OCIO config
+    """
+    config_file = cmds.colorManagementPrefs(query=True, configFilePath=True)
+    if config_file not in input_color_spaces:
+        input_color_spaces[config_file] = cmds.colorManagementPrefs(query=True, inputSpaceNames=True)
+    return input_color_spaces[config_file]
+
+
+class FileNodeIndex:
+    """
+    File nodes of the scene by their normalized path, color space, alphaIsLuminance and uvTilingMode, read from the scene only once
+    The key is the one plan_file_node shares file nodes by, so a reused node reads the same data as a new one would
+    The nodes the builders create are added to it, entries whose node was deleted or changed are found out on lookup
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.refresh()
+
+    def key(self, file_path: str, color_space: str, alpha_is_luminance=None, uv_tiling_mode: int = None):
+        """
+        Returns the key of a file node, settings left out of a plan are the Maya defaults
+        """
+        if alpha_is_luminance is None:
+            alpha_is_luminance = DEFAULT_VALUES["alphaIsLuminance"]
+        if uv_tiling_mode is None:
+            uv_tiling_mode = DEFAULT_VALUES["uvTilingMode"]
+        return core.normalize_path(file_path), color_space, bool(alpha_is_luminance), uv_tiling_mode
+
+    def node_key(self, node: str):
+        """
+        Returns the key of a file node as it is in the scene
+        """
+        return self.key(cmds.getAttr(f"{node}.fileTextureName") or "", cmds.getAttr(f"{node}.colorSpace"),
+                        cmds.getAttr(f"{node}.alphaIsLuminance"), cmds.getAttr(f"{node}.uvTilingMode"))
+
+    def refresh(self):
+        """
+        Reads all the file nodes of the scene again
+        """
+        self.nodes = {}
+        with timing.phase("index"):
+            for node in cmds.ls(type="file") or []:
+                if cmds.getAttr(f"{node}.fileTextureName"):
+                    self.nodes.setdefault(self.node_key(node), node)
+
+    def add(self, node: str, *settings):
+        """
+        Remembers a file node that was just created, settings are the ones of file_settings
+        """
+        self.nodes.setdefault(self.key(*settings), node)
+
+    def lookup(self, *settings) -> str:
+        """
+        Returns the file node that reads the file with the settings of file_settings, None if there is none
+        When the remembered node was deleted, renamed or changed, the scene is read again once
+        """
+        key = self.key(*settings)
+        node = self.nodes.get(key)
+        if node is None:
+            return None
+
+        if cmds.objExists(node) and cmds.nodeType(node) == "file" and self.node_key(node) == key:
+            return node
+
+        self.refresh()
+        return self.nodes.get(key)
+
+
+def forget_file_index(*args):
+    """
+    Drops the file node index, it is read again from the next scene when needed
+    """
+    global scene_file_index
+    scene_file_index = None
+
+
+def forget_scene(*args):
+    """
+    Drops everything known about the open scene, the file node index and the network templates
+    """
+    forget_file_index()
+    scene_templates.clear()
+
+
+def file_index() -> FileNodeIndex:
+    """
+    Returns the file node index of the open scene
+    """
+    global scene_file_index
+    if scene_file_index is None:
+        scene_file_index = FileNodeIndex()
+
+        if om is not None and not scene_callbacks:
+            for message in (om.MSceneMessage.kAfterOpen, om.MSceneMessage.kAfterNew):
+                scene_callbacks.append(om.MSceneMessage.addCallback(message, forget_scene))
+
+    return scene_file_index
+
+
+class CmdsBuilder:
+    """
+    Builds the network with maya.cmds, one command per step
+    All the steps are kept in one undo chunk
+    """
+
+    KINDS = {"shader": "asShader", "texture": "asTexture", "utility": "asUtility"}
+
+    def __init__(self, chunk_name: str = "aiStandardShader"):
+        cmds.undoInfo(openChunk=True, chunkName=chunk_name)
+
+    def create_node(self, node_type: str, name: str = None, kind: str = "utility") -> str:
+        """
+        Creates a shading node, kind is shader, texture or utility like in the Hypershade
+        """
+        flags = {self.KINDS[kind]: True}
+        if name is not None:
+            flags["name"] = name
+        return cmds.shadingNode(node_type, **flags)
+
+    def create_shading_group(self, name: str) -> str:
+        """
+        Creates an empty renderable shading group
+        """
+        return cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name=name)
+
+    def existing(self, name: str) -> str:
+        """
+        Returns a node that is already in the scene
+        """
+        return name
+
+    def set_attr(self, node: str, attr: str, value):
+        """
+        Sets an attribute, strings get their type flag
+        """
+        if isinstance(value, str):
+            cmds.setAttr(f"{node}.{attr}", value, type="string")
+        else:
+            cmds.setAttr(f"{node}.{attr}", value)
+
+    def connect(self, source_node: str, source_attr: str, target_node: str, target_attr: str):
+        """
+        Connects two attributes
+        """
+        cmds.connectAttr(f"{source_node}.{source_attr}", f"{target_node}.{target_attr}", force=True)
+
+    def disconnect(self, source_node: str, source_attr: str, target_node: str, target_attr: str):
+        """
+        Breaks a connection
+        """
+        cmds.disconnectAttr(f"{source_node}.{source_attr}", f"{target_node}.{target_attr}")
+
+    def delete_node(self, node: str):
+        """
+        Deletes a node
+        """
+        cmds.delete(node)
+
+    def name(self, node: str) -> str:
+        """
+        Returns the name of a created node
+        """
+        return node
+
+    def finish(self):
+        """
+        Closes the undo chunk
+        """
+        cmds.undoInfo(closeChunk=True)
+
+    def abort(self):
+        """
+        Closes the undo chunk after a failed build, so the user can undo what was made
+        """
+        cmds.undoInfo(closeChunk=True)
+
+
+class ModifierBuilder:
+    """
+    Records the whole network into one OpenMaya MDGModifier and runs it once at the end
+    It runs through the undo plugin command, so the whole network is one undo step
+    """
+
+    LISTS = {"shader": ("defaultShaderList1", "shaders"),
+             "texture": ("defaultTextureList1", "textures"),
+             "utility": ("defaultRenderUtilityList1", "utilities")}
+
+    def __init__(self):
+        self.modifier = om.MDGModifier()
+        self.names = {}
+        self.reserved = set()
+        self.next_index = {}
+
+    def unique_name(self, name: str) -> str:
+        """
+        Returns the name Maya would give a new node, taking the nodes of this modifier into account
+        """
+        candidate = free_name(name, lambda taken: taken in self.reserved or cmds.objExists(taken))
+        self.reserved.add(candidate)
+        return candidate
+
+    def plug(self, node, attr: str):
+        """
+        Returns the plug of an attribute of a node
+        """
+        return om.MFnDependencyNode(node).findPlug(attr, False)
+
+    def append_to(self, node_name: str, attr: str, source_plug):
+        """
+        Connects a plug into the next free element of an array attribute of an existing node
+        """
+        selection = om.MSelectionList()
+        selection.add(node_name)
+        array_plug = self.plug(selection.getDependNode(0), attr)
+
+        key = (node_name, attr)
+        if key not in self.next_index:
+            indices = array_plug.getExistingArrayAttributeIndices()
+            self.next_index[key] = max(indices) + 1 if indices else 0
+
+        index = self.next_index[key]
+        self.next_index[key] += 1
+        timing.count("MDGModifier.connect")
+        self.modifier.connect(source_plug, array_plug.elementByLogicalIndex(index))
+
+    def rename(self, node, name: str):
+        """
+        Records a rename to a free name, nodes without a name keep the one Maya gives them
+        """
+        if name is not None:
+            self.names[om.MObjectHandle(node).hashCode()] = self.unique_name(name)
+            self.modifier.renameNode(node, self.name(node))
+
+    def create_node(self, node_type: str, name: str = None, kind: str = "utility"):
+        """
+        Creates a shading node and lists it in the Hypershade like shadingNode does
+        """
+        timing.count("MDGModifier.createNode")
+        node = self.modifier.createNode(node_type)
+        self.rename(node, name)
+
+        list_node, list_attr = self.LISTS[kind]
+        self.append_to(list_node, list_attr, self.plug(node, "message"))
+        return node
+
+    def create_shading_group(self, name: str):
+        """
+        Creates an empty renderable shading group with its materialInfo, like sets -renderable does
+        """
+        timing.count("MDGModifier.createNode")
+        shading_group = self.modifier.createNode("shadingEngine")
+        self.rename(shading_group, name)
+        self.append_to("renderPartition", "sets", self.plug(shading_group, "partition"))
+
+        timing.count("MDGModifier.createNode")
+        material_info = self.modifier.createNode("materialInfo")
+        timing.count("MDGModifier.connect")
+        self.modifier.connect(self.plug(shading_group, "message"), self.plug(material_info, "shadingGroup"))
+
+        return shading_group
+
+    def existing(self, name: str):
+        """
+        Returns a node that is already in the scene
+        """
+        selection = om.MSelectionList()
+        selection.add(name)
+        return selection.getDependNode(0)
+
+    def set_attr(self, node, attr: str, value):
+        """
+        Records an attribute value
+        """
+        timing.count("MDGModifier.newPlugValue")
+        plug = self.plug(node, attr)
+        if isinstance(value, str):
+            self.modifier.newPlugValueString(plug, value)
+        elif isinstance(value, bool):
+            self.modifier.newPlugValueBool(plug, value)
+        elif isinstance(value, int):
+            self.modifier.newPlugValueInt(plug, value)
+        else:
+            self.modifier.newPlugValueFloat(plug, value)
+
+    def connect(self, source_node, source_attr: str, target_node, target_attr: str):
+        """
+        Records a connection
+        """
+        timing.count("MDGModifier.connect")
+        self.modifier.connect(self.plug(source_node, source_attr), self.plug(target_node, target_attr))
+
+    def disconnect(self, source_node, source_attr: str, target_node, target_attr: str):
+        """
+        Records breaking a connection
+        """
+        timing.count("MDGModifier.disconnect")
+        self.modifier.disconnect(self.plug(source_node, source_attr), self.plug(target_node, target_attr))
+
+    def delete_node(self, node):
+        """
+        Records deleting a node
+        """
+        timing.count("MDGModifier.deleteNode")
+        self.modifier.deleteNode(node)
+
+    def name(self, node) -> str:
+        """
+        Returns the name a created node has, or will have once the modifier runs
+        """
+        name = self.names.get(om.MObjectHandle(node).hashCode())
+        if name is None:
+            name = om.MFnDependencyNode(node).name()
+        return name
+
+    def finish(self):
+        """
+        Runs the modifier through the undo plugin command
+        """
+        if not cmds.pluginInfo(UNDO_PLUGIN, query=True, loaded=True):
+            cmds.loadPlugin(os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{UNDO_PLUGIN}.py"), quiet=True)
+
+        pending_modifiers.append(self.modifier)
+        timing.count("MDGModifier.doIt")
+        cmds.aiStandardDoModifier()
+
+    def abort(self):
+        """
+        Nothing was added to the scene yet, so the modifier is just dropped
+        """
+        self.modifier = None
+
+
+class RecordingBuilder:
+    """
+    Records the steps as Maya commands without needing Maya, for dry runs and benchmarks
+    Names are made unique against the nodes it created and the existing names it was given
+    """
+
+    def __init__(self, existing_names=()):
+        self.commands = []
+        self.taken = set(existing_names)
+        self.counters = {}
+
+    def numbered_name(self, base: str) -> str:
+        """
+        Returns base with the next free number after it and marks it as taken
+        The last number is remembered per base, so many nodes with the same name don't search from 1 every time
+        """
+        number = self.counters.get(base, 0)
+        while True:
+            number += 1
+            candidate = f"{base}{number}"
+            if candidate not in self.taken:
+                self.counters[base] = number
+                self.taken.add(candidate)
+                return candidate
+
+    def unique_name(self, name: str) -> str:
+        """
+        Returns a free name and marks it as taken
+        """
+        if name in self.taken:
+            return self.numbered_name(name)
+
+        self.taken.add(name)
+        return name
+
+    def create_node(self, node_type: str, name: str = None, kind: str = "utility") -> str:
+        node = self.unique_name(name) if name is not None else self.numbered_name(node_type)
+        self.commands.append(("shadingNode", node_type, node, kind))
+        return node
+
+    def create_shading_group(self, name: str) -> str:
+        node = self.unique_name(name)
+        self.commands.append(("sets", node))
+        return node
+
+    def existing(self, name: str) -> str:
+        return name
+
+    def set_attr(self, node: str, attr: str, value):
+        self.commands.append(("setAttr", f"{node}.{attr}", value))
+
+    def connect(self, source_node: str, source_attr: str, target_node: str, target_attr: str):
+        self.commands.append(("connectAttr", f"{source_node}.{source_attr}", f"{target_node}.{target_attr}"))
+
+    def disconnect(self, source_node: str, source_attr: str, target_node: str, target_attr: str):
+        self.commands.append(("disconnectAttr", f"{source_node}.{source_attr}", f"{target_node}.{target_attr}"))
+
+    def delete_node(self, node: str):
+        self.commands.append(("delete", node))
+
+    def name(self, node: str) -> str:
+        return node
+
+    def finish(self):
+        pass
+
+    def abort(self):
+        pass
+
+
+def make_builder(backend: str = None):
+    """
+    Returns the builder for a backend name
+    "api" falls back to "cmds" when OpenMaya isn't there, "record" only records the commands
+    """
+    if backend is None:
+        backend = DEFAULT_BACKEND
+
+    if backend == "record":
+        return RecordingBuilder()
+    if backend == "api" and om is not None:
+        return ModifierBuilder()
+    if backend in ("api", "cmds"):
+        return CmdsBuilder()
+
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+class ShaderPlan:
+    """
+    Everything one shader network needs, worked out from the texture maps without touching Maya
+    Nodes are [key, node type, name, kind], attributes are [key, attribute, value]
+    and edges are [source key, source attribute, target key, target attribute]
+    Names can contain {shader}, it is replaced by the name the shader really gets
+    Nodes of the "existing" kind are already in the scene, their name is the node that is used
+    """
+
+    def __init__(self, shader_name: str):
+        self.shader_name = shader_name
+        self.nodes = []
+        self.attrs = []
+        self.edges = []
+        self.warnings = []
+        #File nodes by what they read and how, only used while the plan is worked out
+        self.file_keys = {}
+
+    def add_node(self, key: str, node_type: str, name: str = None, kind: str = "utility") -> str:
+        self.nodes.append([key, node_type, name, kind])
+        return key
+
+    def set_attr(self, key: str, attr: str, value):
+        self.attrs.append([key, attr, value])
+
+    def connect(self, source_key: str, source_attr: str, target_key: str, target_attr: str):
+        self.edges.append([source_key, source_attr, target_key, target_attr])
+
+    def to_dict(self) -> dict:
+        return {
+            "shaderName": self.shader_name,
+            "nodes": self.nodes,
+            "attrs": self.attrs,
+            "edges": self.edges,
+            "warnings": self.warnings,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        plan = cls(data["shaderName"])
+        plan.nodes = [list(node) for node in data["nodes"]]
+        plan.attrs = [list(attr) for attr in data["attrs"]]
+        plan.edges = [list(edge) for edge in data["edges"]]
+        plan.warnings = list(data.get("warnings", []))
+        return plan
+
+    def signature(self) -> str:
+        """
+        Returns a hash of the plan, two plans with the same signature build the same network
+        """
+        return hashlib.sha1(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()
+
+    def stats(self) -> dict:
+        return {"nodes": len(self.nodes), "attrs": len(self.attrs), "edges": len(self.edges)}
+
+
+def diff_plans(old_plan: ShaderPlan, new_plan: ShaderPlan) -> dict:
+    """
+    Returns the nodes, attributes and edges that were added or removed between two plans
+    """
+    diff = {}
+    for part in ("nodes", "attrs", "edges"):
+        old_items = {json.dumps(item) for item in getattr(old_plan, part)}
+        new_items = {json.dumps(item) for item in getattr(new_plan, part)}
+        diff[part] = {
+            "added": [json.loads(item) for item in sorted(new_items - old_items)],
+            "removed": [json.loads(item) for item in sorted(old_items - new_items)],
+        }
+    return diff
+
+
+def plan_place2d_node(plan: ShaderPlan, key: str, name: str = None) -> str:
+    """
+    Adds a place2dTexture node
+    """
+    return plan.add_node(key, 'place2dTexture', name, "utility")
+
+
+def connect_place2d_node(plan: ShaderPlan, place2d_key: str, file_key: str):
+    """
+    Connects all the placement attributes of a place2dTexture node into a file node
+    """
+    plan.connect(place2d_key, 'outUV', file_key, 'uvCoord')
+    plan.connect(place2d_key, 'outUvFilterSize', file_key, 'uvFilterSize')
+
+    for i in PLACE2D_CONNECTIONS:
+        plan.connect(place2d_key, i, file_key, i)
+
+
+def plan_file_node(plan: ShaderPlan, texture_type: str, file_path: str, color_space: str, alpha_is_luminance=None,
+                   place2d_key: str = None, uv_tiling_mode: int = None) -> str:
+    """
+    Adds a file node driven by the given place2dTexture node, or by its own one when none is given
+    uv_tiling_mode is set for tiled textures, their path has the tile token like <UDIM>
+    Inputs that read the same image with the same settings get the same file node
+    """
+    settings = (core.normalize_path(file_path), color_space, alpha_is_luminance, uv_tiling_mode)
+    if settings in plan.file_keys:
+        return plan.file_keys[settings]
+
+    file_key = plan.add_node(f"{texture_type}_file", 'file', f"{texture_type}_file", "texture")
+    plan.file_keys[settings] = file_key
+    if uv_tiling_mode is not None:
+        plan.set_attr(file_key, "uvTilingMode", uv_tiling_mode)
+    plan.set_attr(file_key, "fileTextureName", file_path)
+
+    if place2d_key is None:
+        place2d_key = plan_place2d_node(plan, f"{texture_type}_place2d")
+
+    connect_place2d_node(plan, place2d_key, file_key)
+
+    plan.set_attr(file_key, "colorSpace", color_space)
+    if alpha_is_luminance is not None:
+        plan.set_attr(file_key, "alphaIsLuminance", alpha_is_luminance)
+
+    return file_key
+
+
+class Placement:
+    """
+    Hands out the place2dTexture node for each file node of a material
+    When shared, one node made on first use drives every file node whose texture doesn't opt out with sharePlacement
+    """
+
+    def __init__(self, plan: ShaderPlan, shared: bool = True):
+        self.plan = plan
+        self.shared = shared
+        self.shared_key = None
+
+    def node_for(self, details: dict) -> str:
+        """
+        Returns the shared place2dTexture node, or None when the file node should get its own
+        """
+        if not self.shared or not details.get("sharePlacement", True):
+            return None
+
+        if self.shared_key is None:
+            self.shared_key = plan_place2d_node(self.plan, "place2d", "{shader}_place2d")
+        return self.shared_key
+
+
+def plan_shader_network(shader_name: str, texture_maps: dict, normal_type: str = None, shared_placement: bool = True) -> ShaderPlan:
+    """
+    Works out the Standard Surface Shader network for the texture maps
+    Color spaces are taken from the texture maps, normal_type picks which normal map is used
+    With shared_placement one place2dTexture drives all the file nodes of the material
+    A packed texture is one file node whose channels drive several inputs, a texture of its own wins over a channel
+    """
+    plan = ShaderPlan(shader_name)
+
+    #Inputs already driven by a packed texture
+    packed_inputs = set()
+
+    shader = plan.add_node("shader", 'aiStandardSurface', shader_name, "shader")
+    shading_group = plan.add_node("shadingGroup", 'shadingEngine', "{shader}SG", "shadingGroup")
+    plan.connect(shader, "outColor", shading_group, "surfaceShader")
+
+    placement = Placement(plan, shared_placement)
+
+    #Boolean if normal and bump exists at the same time
+    createBump = "bump" in texture_maps and "normal" not in texture_maps
+
+    #This creates everything and connects based on the dictionary
+    for texture_type, details in texture_maps.items():
+
+        if "normal" == texture_type:
+
+            normal_map_details = details[core.pick_normal_type(details, normal_type)]
+
+            file_key = plan_file_node(plan, texture_type, normal_map_details['filePath'], normal_map_details['colorSpace'],
+                                      place2d_key=placement.node_for(normal_map_details),
+                                      uv_tiling_mode=normal_map_details.get('uvTilingMode'))
+
+            # Create and connect aiNormalMap node
+            normal_key = plan.add_node("normal", 'aiNormalMap', "{shader}_normal", "utility")
+
+            plan.connect(file_key, "outColor", normal_key, "input")
+            plan.connect(normal_key, "outValue", shader, "normalCamera")
+
+        elif "height" == texture_type:
+
+            #Height map connections with the displacement shader
+            file_key = plan_file_node(plan, texture_type, details['filePath'], details['colorSpace'], details['enableAlphaIsLuminance'],
+                                      placement.node_for(details), details.get('uvTilingMode'))
+
+            # Create and connect displacement shader
+            disp_key = plan.add_node("disp", 'displacementShader', "{shader}_disp", "shader")
+            plan.set_attr(disp_key, "aiDisplacementZeroValue", 0.5)
+            plan.connect(file_key, "outAlpha", disp_key, "displacement")
+            plan.connect(disp_key, "displacement", shading_group, "displacementShader")
+
+        elif "bump" == texture_type:
+            #Bump map connections
+
+            if createBump:
+                file_key = plan_file_node(plan, texture_type, details['filePath'], details['colorSpace'], details['enableAlphaIsLuminance'],
+                                          placement.node_for(details), details.get('uvTilingMode'))
+
+                bump_key = plan.add_node("bump", 'aiBump2d', "{shader}_bump", "utility")
+
+                plan.connect(file_key, "outAlpha", bump_key, "bumpMap")
+
+            else:
+                plan.warnings.append("Bump map will not be created since there is a Normal map")
+
+        elif "channels" in details:
+            #Packed map, one read for several inputs
+            channels = []
+            for channel, target in details["channels"].items():
+                if target is None:
+                    continue
+                if target in texture_maps:
+                    plan.warnings.append(f"{target} has its own texture, channel {channel} of {texture_type} isn't used")
+                elif target in packed_inputs:
+                    plan.warnings.append(f"{target} already comes from a packed texture, channel {channel} of {texture_type} isn't used")
+                else:
+                    channels.append((channel, target))
+                    packed_inputs.add(target)
+
+            if not channels:
+                continue
+
+            file_key = plan_file_node(plan, texture_type, details['filePath'], details['colorSpace'], details['enableAlphaIsLuminance'],
+                                      placement.node_for(details), details.get('uvTilingMode'))
+
+            for channel, target in channels:
+                plan.connect(file_key, PACKED_OUTPUTS[channel], shader, target)
+
+        else:
+            # Everything else
+            file_key = plan_file_node(plan, texture_type, details['filePath'], details['colorSpace'], details['enableAlphaIsLuminance'],
+                                      placement.node_for(details), details.get('uvTilingMode'))
+
+            # Connect based on connectType
+            connect_attr = "outColor" if details['connectType'].lower() == "color" else "outAlpha"
+
+            plan.connect(file_key, connect_attr, shader, texture_type)
+
+    return plan
+
+
+def file_settings(values: dict, key: str) -> tuple:
+    """
+    Returns the path, color space, alphaIsLuminance and uvTilingMode of a file node of a plan, values are its attrs by (key, attr)
+    The settings the plan leaves out are None
+    """
+    return (values[(key, "fileTextureName")], values[(key, "colorSpace")], values.get((key, "alphaIsLuminance")),
+            values.get((key, "uvTilingMode")))
+
+
+def reuse_file_nodes(plan: ShaderPlan, lookup, kind: str = "existing") -> list:
+    """
+    Swaps the file nodes of a plan for file nodes already in the scene that read the same file with the same settings
+    lookup returns the existing file node for the settings of file_settings, or None
+    kind is "existing" for scene nodes, or "batch" when lookup hands out builder handles of nodes made for an earlier plan
+    The reused nodes keep their own settings and placement, place2dTexture nodes that no longer drive anything are dropped
+    Returns the keys of the reused file nodes
+    """
+    values = {(key, attr): value for key, attr, value in plan.attrs}
+    reused = set()
+
+    for node in plan.nodes:
+        key, node_type = node[0], node[1]
+        if node_type != "file" or node[3] != "texture":
+            continue
+
+        existing = lookup(*file_settings(values, key))
+        if existing is not None:
+            node[2], node[3] = existing, kind
+            reused.add(key)
+
+    if reused:
+        plan.attrs = [attr for attr in plan.attrs if attr[0] not in reused]
+        plan.edges = [edge for edge in plan.edges if edge[2] not in reused]
+        sources = {edge[0] for edge in plan.edges}
+        plan.nodes = [node for node in plan.nodes if node[1] != "place2dTexture" or node[0] in sources]
+
+    return sorted(reused)
+
+
+def add_plan(builder, plan: ShaderPlan) -> dict:
+    """
+    Adds all the steps of a plan to a builder, the shader node comes first so the other names can use its real name
+    Returns the builder handles of the nodes by their plan keys
+    """
+    handles = {}
+    shader_name = plan.shader_name
+
+    with timing.phase("nodes"):
+        for key, node_type, name, kind in plan.nodes:
+            #Made for an earlier plan of the same build, the name is its builder handle
+            if kind == "batch":
+                handles[key] = name
+                continue
+
+            if name is not None:
+                name = name.replace("{shader}", shader_name)
+
+            if kind == "existing":
+                handles[key] = builder.existing(name)
+            elif kind == "shadingGroup":
+                handles[key] = builder.create_shading_group(name)
+            else:
+                handles[key] = builder.create_node(node_type, name, kind)
+
+            if key == "shader":
+                shader_name = builder.name(handles[key])
+
+    with timing.phase("attrs"):
+        for key, attr, value in plan.attrs:
+            builder.set_attr(handles[key], attr, value)
+
+    with timing.phase("connections"):
+        for source_key, source_attr, target_key, target_attr in plan.edges:
+            builder.connect(handles[source_key], source_attr, handles[target_key], target_attr)
+
+    return handles
+
+
+def remember_file_nodes(index: FileNodeIndex, plan: ShaderPlan, names: dict, keys=None):
+    """
+    Adds the file nodes a plan created to the file node index, only the ones in keys when they are given
+    """
+    values = {(key, attr): value for key, attr, value in plan.attrs}
+    for key, node_type, name, kind in plan.nodes:
+        if node_type == "file" and kind != "existing" and (keys is None or key in keys):
+            index.add(names[key], *file_settings(values, key))
+
+
+def execute_plan(plan: ShaderPlan, builder=None, warn=raise_warning, index: FileNodeIndex = None) -> dict:
+    """
+    Builds a plan with a builder, by default the one of DEFAULT_BACKEND
+    With a file node index, file nodes already in the scene are reused and the new ones are added to it
+    Returns the names of the created and reused nodes by their plan keys
+    """
+    return execute_plans([plan], builder, warn, index)[0]
+
+
+def execute_plans(plans: list, builder=None, warn=raise_warning, index: FileNodeIndex = None) -> list:
+    """
+    Builds several plans with one builder, with the "api" backend they are one modifier and one undo step
+    With a file node index, a file node made for one plan is also used by the later plans that read the same file
+    Returns the node names of every plan in the same order
+    """
+    if builder is None:
+        builder = make_builder()
+
+    all_handles = []
+    #Handles of the file nodes made so far by the key of the file node index
+    batch_files = {}
+    try:
+        for plan in plans:
+            if index is not None:
+                reuse_file_nodes(plan, index.lookup)
+                reuse_file_nodes(plan, lambda *settings: batch_files.get(index.key(*settings)), "batch")
+
+            for msg in plan.warnings:
+                warn(msg)
+
+            handles = add_plan(builder, plan)
+            all_handles.append(handles)
+
+            if index is not None:
+                values = {(key, attr): value for key, attr, value in plan.attrs}
+                for key, node_type, name, kind in plan.nodes:
+                    if node_type == "file" and kind == "texture":
+                        file_key = index.key(*file_settings(values, key))
+                        batch_files.setdefault(file_key, handles[key])
+    except Exception:
+        builder.abort()
+        raise
+
+    #The modifier backend only makes the nodes here
+    with timing.phase("commit"):
+        builder.finish()
+
+    all_names = []
+    for plan, handles in zip(plans, all_handles):
+        names = {key: builder.name(handle) for key, handle in handles.items()}
+        all_names.append(names)
+
+        #Nodes shared with an earlier plan belong to that plan, patching this one must not delete them
+        for node in plan.nodes:
+            if node[3] == "batch":
+                node[2], node[3] = names[node[0]], "existing"
+
+        if index is not None:
+            remember_file_nodes(index, plan, names)
+
+        #Gives a warning if the shader name is already exists
+        if names["shader"] != plan.shader_name:
+            warn(f"Material {plan.shader_name} already exists, created a material with name: {names['shader']}")
+
+    return all_names
+
+
+def patch_plan(old_plan: ShaderPlan, names: dict, new_plan: ShaderPlan, builder=None, warn=raise_warning,
+               index: FileNodeIndex = None) -> dict:
+    """
+    Changes a network built from old_plan into the one of new_plan, only the nodes, attributes and connections that differ are touched
+    names are the node names the old plan got, nodes that were reused from the scene are disconnected but never deleted
+    With a file node index, file nodes already in the scene are reused for new textures too
+    A template built as the shader is dropped, see NetworkTemplates
+    Returns the node names of the new plan
+    """
+    if builder is None:
+        builder = make_builder()
+    scene_templates.forget(names["shader"])
+
+    own_nodes = {names[node[0]] for node in old_plan.nodes if node[3] != "existing"}
+    if index is not None:
+        def lookup(*settings) -> str:
+            node = index.lookup(*settings)
+            return node if node not in own_nodes else None
+        reuse_file_nodes(new_plan, lookup)
+
+    for msg in new_plan.warnings:
+        warn(msg)
+
+    old_nodes = {node[0]: node for node in old_plan.nodes}
+    new_nodes = {node[0]: node for node in new_plan.nodes}
+    kept = {key for key, node in new_nodes.items() if old_nodes.get(key) == node}
+    removed = [key for key in old_nodes if key not in kept]
+    added = [key for key in new_nodes if key not in kept]
+    old_edges = {tuple(edge) for edge in old_plan.edges}
+    new_edges = {tuple(edge) for edge in new_plan.edges}
+    old_values = {(key, attr): value for key, attr, value in old_plan.attrs}
+    new_values = {(key, attr): value for key, attr, value in new_plan.attrs}
+
+    try:
+        old_handles = {key: builder.existing(names[key]) for key in old_nodes}
+
+        #Connections of deleted nodes go with them, the others are broken one by one
+        survives = kept | {key for key in removed if old_nodes[key][3] == "existing"}
+        for edge in sorted(old_edges):
+            if edge[0] in survives and edge[2] in survives and (edge not in new_edges or edge[0] in added or edge[2] in added):
+                builder.disconnect(old_handles[edge[0]], edge[1], old_handles[edge[2]], edge[3])
+
+        for key in removed:
+            if old_nodes[key][3] != "existing":
+                builder.delete_node(old_handles[key])
+
+        handles = {key: old_handles[key] for key in kept}
+        shader_name = names["shader"]
+        for key in added:
+            node_type, name, kind = new_nodes[key][1:]
+            if name is not None:
+                name = name.replace("{shader}", shader_name)
+            if kind == "existing":
+                handles[key] = builder.existing(name)
+            elif kind == "shadingGroup":
+                handles[key] = builder.create_shading_group(name)
+            else:
+                handles[key] = builder.create_node(node_type, name, kind)
+
+        for key, attr in old_values:
+            if key in kept and (key, attr) not in new_values and attr in DEFAULT_VALUES:
+                builder.set_attr(handles[key], attr, DEFAULT_VALUES[attr])
+        for key, attr, value in new_plan.attrs:
+            if key in added or old_values.get((key, attr)) != value:
+                builder.set_attr(handles[key], attr, value)
+
+        for edge in new_plan.edges:
+            if edge[0] in added or edge[2] in added or tuple(edge) not in old_edges:
+                builder.connect(handles[edge[0]], edge[1], handles[edge[2]], edge[3])
+    except Exception:
+        builder.abort()
+        raise
+
+    with timing.phase("commit"):
+        builder.finish()
+    new_names = {key: builder.name(handle) for key, handle in handles.items()}
+
+    if index is not None:
+        remember_file_nodes(index, new_plan, new_names, added)
+
+    return new_names
+
+
+def shader_exists(shader_name: str) -> bool:
+    """
+    Returns True when the scene has an aiStandardSurface with that name
+    """
+    return cmds.objExists(shader_name) and cmds.nodeType(shader_name) == "aiStandardSurface"
+
+
+def incoming_connections(node: str) -> dict:
+    """
+    Returns the source node and attribute of every connected input of a node, by the input attribute
+    """
+    plugs = cmds.listConnections(node, source=True, destination=False, connections=True, plugs=True) or []
+    return {target.split(".", 1)[1]: source.split(".", 1) for target, source in zip(plugs[::2], plugs[1::2])}
+
+
+def drives_other_networks(node: str, network_nodes) -> bool:
+    """
+    Returns True when a node also drives shading nodes outside the given ones, like a file node reused by another material
+    """
+    outputs = [output for output in cmds.listConnections(node, source=False, destination=True) or []
+               if output not in network_nodes]
+    if not outputs:
+        return False
+    output_types = (cmds.ls(outputs, showType=True) or [])[1::2]
+    return any(output_type in NETWORK_NODE_TYPES + ("aiStandardSurface", "shadingEngine") for output_type in output_types)
+
+
+def read_network(shader_name: str, plan: ShaderPlan):
+    """
+    Works out the plan the network of an existing shader would have, so patch_plan can change it into plan
+    The scene nodes are given the keys of plan by following its connections up from the shader and its shading group
+    Plan nodes with no path to the shader, like the aiBump2d and its file, are found down from the nodes already given
+    a key or by their name, and followed up from there, see UNCONNECTED_NODES
+    Nodes of the network plan has no place for get keys of their own, so the patch removes them
+    Nodes that also drive other networks are "existing", they keep their inputs and are never deleted
+    Returns the plan of the scene and its node names by key
+    """
+    new_nodes = {node[0]: node for node in plan.nodes}
+    edges_into = {}
+    for edge in plan.edges:
+        edges_into.setdefault(edge[2], []).append(edge)
+
+    shading_groups = cmds.listConnections(f"{shader_name}.outColor", source=False, destination=True, type="shadingEngine") or []
+
+    #Every query is made once, the network is walked again when a node turns out to drive other networks
+    inputs_cache = {}
+    outputs_cache = {}
+    types_cache = {}
+
+    def node_type(node: str) -> str:
+        if node not in types_cache:
+            types_cache[node] = cmds.nodeType(node)
+        return types_cache[node]
+
+    def find_nodes(shared: set):
+        """
+        Gives the scene nodes the keys of plan, the inputs of shared nodes aren't followed
+        Returns the node names by key, the types of nodes plan has no key for and the connections between them
+        """
+        names = {"shader": shader_name}
+        keys = {shader_name: "shader"}
+        scene_types = {}
+        connections = []
+        if shading_groups and "shadingGroup" in new_nodes:
+            names["shadingGroup"] = shading_groups[0]
+            keys[shading_groups[0]] = "shadingGroup"
+
+        def add(key: str, name: str):
+            names[key] = name
+            keys[name] = key
+            queue.append(key)
+
+        #Breadth first up the network, then down from the found nodes to the plan nodes not found yet
+        queue = list(names)
+        position = 0
+        while True:
+            for key in queue[position:]:
+                position += 1
+                if names[key] in shared:
+                    continue
+
+                if names[key] not in inputs_cache:
+                    inputs_cache[names[key]] = incoming_connections(names[key])
+                inputs = inputs_cache[names[key]]
+                if key == "shadingGroup":
+                    inputs = {attr: source for attr, source in inputs.items() if attr in SHADING_GROUP_INPUTS}
+
+                for source_key, source_attr, target_key, target_attr in edges_into.get(key, []):
+                    source = inputs.get(target_attr)
+                    if source is not None and source_key not in names and source[0] not in keys and \
+                            node_type(source[0]) == new_nodes[source_key][1]:
+                        add(source_key, source[0])
+
+                for target_attr, (source, source_attr) in sorted(inputs.items()):
+                    if source not in keys:
+                        if node_type(source) not in NETWORK_NODE_TYPES:
+                            continue
+                        scene_types[f"scene_{source}"] = node_type(source)
+                        add(f"scene_{source}", source)
+                    connections.append((keys[source], source_attr, key, target_attr))
+
+            for source_key, source_attr, target_key, target_attr in plan.edges:
+                if source_key not in names or target_key in names or names[source_key] in shared:
+                    continue
+                plug = f"{names[source_key]}.{source_attr}"
+                if plug not in outputs_cache:
+                    outputs_cache[plug] = cmds.listConnections(plug, source=False, destination=True, plugs=True) or []
+                for output in outputs_cache[plug]:
+                    target, attr = output.split(".", 1)
+                    if attr == target_attr and target not in keys and node_type(target) == new_nodes[target_key][1]:
+                        add(target_key, target)
+                        break
+
+            for key, node_type_name, name, kind in plan.nodes:
+                if key not in names and name is not None and "{shader}" in name:
+                    name = name.replace("{shader}", shader_name)
+                    if name not in keys and cmds.objExists(name) and node_type(name) == node_type_name:
+                        add(key, name)
+            for node_type_name, name in UNCONNECTED_NODES.items():
+                name = name.replace("{shader}", shader_name)
+                if name not in keys and cmds.objExists(name) and node_type(name) == node_type_name:
+                    scene_types[f"scene_{name}"] = node_type_name
+                    add(f"scene_{name}", name)
+
+            if position == len(queue):
+                return names, keys, scene_types, connections
+
+    #Whether a node drives other networks is only known once the whole network is found
+    shared = set()
+    while True:
+        names, keys, scene_types, connections = find_nodes(shared)
+        found = {name for key, name in names.items() if key not in ("shader", "shadingGroup") and name not in shared
+                 and drives_other_networks(name, keys)}
+        if not found:
+            break
+        shared |= found
+
+    old_plan = ShaderPlan(plan.shader_name)
+    for key, name in names.items():
+        if key in scene_types:
+            node = [key, scene_types[key], name, "utility"]
+        else:
+            node = list(new_nodes[key])
+        if name in shared:
+            node[2:] = [name, "existing"]
+        old_plan.nodes.append(node)
+    for connection in connections:
+        old_plan.connect(*connection)
+
+    for key, node_type_name, name, kind in old_plan.nodes:
+        if key in ("shader", "shadingGroup") or kind == "existing":
+            continue
+
+        planned = [attr for attr_key, attr, value in plan.attrs if attr_key == key]
+        for attr in planned:
+            old_plan.set_attr(key, attr, cmds.getAttr(f"{names[key]}.{attr}"))
+
+        #Settings the plan leaves out only count when they aren't the default, the patch then sets them back
+        if node_type_name == "file":
+            for attr in DEFAULT_VALUES:
+                if attr not in planned:
+                    value = cmds.getAttr(f"{names[key]}.{attr}")
+                    if value != DEFAULT_VALUES[attr]:
+                        old_plan.set_attr(key, attr, value)
+
+    return old_plan, names
+
+
+def update_network(plan: ShaderPlan, builder=None, warn=raise_warning, index: FileNodeIndex = None) -> dict:
+    """
+    Changes the network of the existing shader named like the plan into the one of the plan, see read_network
+    Only new paths, color spaces and added or removed textures are touched, no second shader is made
+    Returns the node names of the plan
+    """
+    with timing.phase("read"):
+        old_plan, names = read_network(plan.shader_name, plan)
+    return patch_plan(old_plan, names, plan, builder, warn, index)
+
+
+def update_existing(plans: list, backend: str = None, warn=raise_warning, index: FileNodeIndex = None) -> dict:
+    """
+    Updates the networks of the plans whose shader is already in the scene, each one is its own undo step
+    Returns the node names by the position of the plan, the plans that aren't there are left to be built
+    """
+    updated = {}
+    for position, plan in enumerate(plans):
+        if shader_exists(plan.shader_name):
+            updated[position] = update_network(plan, make_builder(backend), warn, index)
+    return updated
+
+
+def plan_layout(plan: ShaderPlan) -> str:
+    """
+    Returns a hash of what a plan builds without its file paths, color spaces and names
+    Plans with the same layout can be cloned from each other
+    """
+    nodes = [[key, node_type, kind] for key, node_type, name, kind in plan.nodes]
+    attrs = [[key, attr] if attr in TEMPLATE_ATTRS else [key, attr, value] for key, attr, value in plan.attrs]
+    return hashlib.sha1(json.dumps([nodes, attrs, plan.edges]).encode()).hexdigest()
+
+
+class NetworkTemplates:
+    """
+    Networks already in the scene by layout, further materials of a layout are duplicated from them with their upstream nodes
+    Only the file settings and names of a clone are set, a handful of commands instead of a whole build
+    A template whose shader is patched is dropped, see patch_plan
+    Networks that use file nodes of other networks are never templates or clones, they are built the normal way
+    """
+
+    def __init__(self):
+        #Layout -> [plan, node names, plan keys in the order duplicate returns the nodes]
+        #The order is None until it is learned and False when the duplicate never matched the plan
+        self.templates = {}
+
+    def clear(self):
+        self.templates.clear()
+
+    def add(self, plan: ShaderPlan, names: dict):
+        """
+        Makes a built network the template of its layout, unless the layout has one already
+        """
+        if not any(kind == "existing" for key, node_type, name, kind in plan.nodes):
+            self.templates.setdefault(plan_layout(plan), [plan, names, None])
+
+    def forget(self, shader_name: str):
+        """
+        Drops the template built as a shader, its network no longer matches the plan it was made from once it is patched
+        """
+        for layout, template in list(self.templates.items()):
+            if template[1]["shader"] == shader_name:
+                del self.templates[layout]
+
+    def template_for(self, plan: ShaderPlan):
+        """
+        Returns the template of the layout of a plan, None when there is none, it can't be cloned or its shader was deleted
+        """
+        layout = plan_layout(plan)
+        template = self.templates.get(layout)
+        if template is None or template[2] is False:
+            return None
+        if not cmds.objExists(template[1]["shader"]):
+            del self.templates[layout]
+            return None
+        return template
+
+    @staticmethod
+    def roots(plan: ShaderPlan) -> list:
+        """
+        Returns the keys of the nodes that drive nothing but the shading group, the rest of the network is upstream of them
+        """
+        shading_groups = {key for key, node_type, name, kind in plan.nodes if kind == "shadingGroup"}
+        sources = {edge[0] for edge in plan.edges if edge[2] not in shading_groups}
+        return [key for key, node_type, name, kind in plan.nodes if kind != "shadingGroup" and key not in sources]
+
+    @staticmethod
+    def learn_order(plan: ShaderPlan, roots: list, new_nodes: list) -> list:
+        """
+        Works out which plan key every duplicated node belongs to by following the connections up from the roots
+        Returns the keys in the order of new_nodes, None when the duplicate doesn't match the plan
+        """
+        found = dict(zip(roots, new_nodes))
+        kinds = {key: kind for key, node_type, name, kind in plan.nodes}
+        changed = True
+        while changed:
+            changed = False
+            for source_key, source_attr, target_key, target_attr in plan.edges:
+                if target_key in found and source_key not in found and kinds[source_key] != "shadingGroup":
+                    sources = cmds.listConnections(f"{found[target_key]}.{target_attr}", source=True, destination=False) or []
+                    if sources:
+                        found[source_key] = sources[0]
+                        changed = True
+
+        keys = {node: key for key, node in found.items()}
+        if len(found) != len(kinds) - len([kind for kind in kinds.values() if kind == "shadingGroup"]):
+            return None
+        if any(node not in keys for node in new_nodes):
+            return None
+        return [keys[node] for node in new_nodes]
+
+    def clone(self, plan: ShaderPlan, template: list, warn=raise_warning) -> dict:
+        """
+        Duplicates the template network and points the copy at the files, color spaces and names of the plan
+        Returns the node names by plan key, None when the template can't be cloned, nothing is left behind then
+        """
+        template_plan, template_names, order = template
+        roots = self.roots(template_plan)
+        types = {key: node_type for key, node_type, name, kind in plan.nodes}
+
+        builder = CmdsBuilder("aiStandardClone")
+        try:
+            with timing.phase("clone"):
+                new_nodes = cmds.duplicate([template_names[key] for key in roots], upstreamNodes=True)
+
+            #The order duplicate returns the nodes in is learned once, after that only the node types are checked
+            if order is not None:
+                new_types = (cmds.ls(new_nodes, showType=True) or [])[1::2]
+                if len(order) != len(new_types) or any(types[key] != node_type for key, node_type in zip(order, new_types)):
+                    order = None
+            if order is None:
+                order = self.learn_order(template_plan, roots, new_nodes)
+                template[2] = order if order is not None else False
+                if order is None:
+                    cmds.delete(new_nodes)
+                    builder.finish()
+                    return None
+            names = dict(zip(order, new_nodes))
+
+            with timing.phase("attrs"):
+                for key, attr, value in plan.attrs:
+                    if attr in TEMPLATE_ATTRS:
+                        builder.set_attr(names[key], attr, value)
+
+            with timing.phase("nodes"):
+                shader_name = names["shader"] = cmds.rename(names["shader"], plan.shader_name)
+                for key, node_type, name, kind in plan.nodes:
+                    if kind == "shadingGroup":
+                        names[key] = builder.create_shading_group(name.replace("{shader}", shader_name))
+                    elif key != "shader" and name is not None and "{shader}" in name:
+                        names[key] = cmds.rename(names[key], name.replace("{shader}", shader_name))
+
+            with timing.phase("connections"):
+                shading_groups = {key for key, node_type, name, kind in plan.nodes if kind == "shadingGroup"}
+                for source_key, source_attr, target_key, target_attr in plan.edges:
+                    if target_key in shading_groups:
+                        builder.connect(names[source_key], source_attr, names[target_key], target_attr)
+        except Exception:
+            builder.abort()
+            raise
+
+        builder.finish()
+
+        for msg in plan.warnings:
+            warn(msg)
+        if shader_name != plan.shader_name:
+            warn(f"Material {plan.shader_name} already exists, created a material with name: {shader_name}")
+
+        return names
+
+
+#Templates of the open scene, forgotten when another scene is opened
+scene_templates = NetworkTemplates()
+
+
+def execute_from_templates(plans: list, templates: NetworkTemplates = None, backend: str = None, warn=raise_warning,
+                           index: FileNodeIndex = None) -> list:
+    """
+    Builds plans by cloning the network of their layout, the first plan of a layout is built normally and becomes its template
+    Plans that reuse file nodes of the scene are always built normally
+    Returns the node names of every plan in the same order
+    """
+    if templates is None:
+        templates = scene_templates
+
+    all_names = []
+    for plan in plans:
+        if index is not None:
+            reuse_file_nodes(plan, index.lookup)
+
+        template = templates.template_for(plan)
+        names = templates.clone(plan, template, warn) if template is not None else None
+
+        if names is None:
+            names = execute_plan(plan, make_builder(backend), warn, index)
+            templates.add(plan, names)
+        elif index is not None:
+            remember_file_nodes(index, plan, names)
+
+        all_names.append(names)
+
+    return all_names
+
+
+def build_plan(shader_name: str, texture_maps: dict, normal_type: str = None, warn=raise_warning,
+               shared_placement: bool = True, backend: str = None, reuse_files: bool = True,
+               templates: NetworkTemplates = None, update: bool = False):
+    """
+    Works out and builds the network of the texture maps, see build_shader_network
+    With templates, the network is cloned from one with the same layout when there is one
+    With update, the network of an existing shader with that name is changed to match instead of a second shader made
+    Returns the plan and the names of its nodes, so the network can be patched later
+    """
+    with timing.phase("plan"):
+        plan = plan_shader_network(shader_name, texture_maps, normal_type, shared_placement)
+    index = file_index() if reuse_files and backend != "record" else None
+    if update and backend != "record" and shader_exists(shader_name):
+        return plan, update_network(plan, make_builder(backend), warn, index)
+    if templates is not None and backend != "record":
+        return plan, execute_from_templates([plan], templates, backend, warn, index)[0]
+    return plan, execute_plan(plan, make_builder(backend), warn, index)
+
+
+def build_texture_sets(base_name: str, texture_sets: dict, normal_type: str = None, warn=raise_warning,
+                       shared_placement: bool = True, backend: str = None, reuse_files: bool = True,
+                       templates: NetworkTemplates = None, update: bool = False) -> list:
+    """
+    Works out one network for every texture set and builds them all in one go, see build_shader_network
+    Every shader is named after its set, see core.shader_name_for_set
+    With templates, sets with the same layout are cloned instead, one after another
+    With update, sets whose shader is already in the scene get their network changed to match, see update_network
+    Returns the set name, plan and node names of every set
+    """
+    set_names = sorted(texture_sets, key=str.lower)
+    with timing.phase("plan"):
+        plans = [plan_shader_network(core.shader_name_for_set(base_name, set_name), texture_sets[set_name], normal_type,
+                                     shared_placement) for set_name in set_names]
+    index = file_index() if reuse_files and backend != "record" else None
+    updated = update_existing(plans, backend, warn, index) if update and backend != "record" else {}
+
+    new_plans = [plan for position, plan in enumerate(plans) if position not in updated]
+    if templates is not None and backend != "record":
+        built = iter(execute_from_templates(new_plans, templates, backend, warn, index))
+    else:
+        built = iter(execute_plans(new_plans, make_builder(backend), warn, index))
+    all_names = [updated[position] if position in updated else next(built) for position in range(len(plans))]
+    return list(zip(set_names, plans, all_names))
+
+
+def build_shader_network(shader_name: str, texture_maps: dict, normal_type: str = None, warn=raise_warning,
+                         shared_placement: bool = True, backend: str = None, reuse_files: bool = True):
+    """
+    Creates Standard Surface Shader, imports texture maps and connects them to the correct part of shader
+    backend is "api" for one MDGModifier, "cmds" for maya.cmds or "record" for a dry run
+    reuse_files connects file nodes already in the scene that read the same texture instead of making new ones
+    Returns the shader and the shading group
+    """
+    plan, names = build_plan(shader_name, texture_maps, normal_type, warn, shared_placement, backend, reuse_files)
+    return names["shader"], names["shadingGroup"]
@@ -0,0 +1,298 @@
+#Jaroslav Lajta
+
+"""
+Reads only the headers of EXR, PNG, TIFF, TGA and JPEG files, pixels are never decoded
+The facts from the headers pick better color space and alpha defaults than the JSON alone
+"""
+
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import aiStandardCore as core
+import aiStandardTiming as timing
+
+
+#How much of a file is read at first, enough for nearly every header
+HEADER_SIZE = 65536
+
+#Color spaces for linear color, the first one Maya knows is used
+LINEAR_COLOR_SPACES = ["scene-linear Rec.709-sRGB", "Linear Rec.709 (sRGB)", "scene-linear Rec 709/sRGB"]
+
+RAW_COLOR_SPACE = "Raw"
+
+#EXR pixel types and their bit depth
+EXR_PIXEL_TYPES = {0: (32, False), 1: (16, True), 2: (32, True)}
+
+#PNG color types and their number of channels
+PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+
+#TIFF tags read: width, height, bits per sample, samples per pixel and sample format
+TIFF_TAGS = (256, 257, 258, 277, 339)
+
+#TIFF types those tags come in: BYTE, SHORT and LONG, with their struct format
+TIFF_TYPES = {1: "B", 3: "H", 4: "I"}
+
+#Formats whose headers probe_image reads, the others keep the settings from the JSON
+PROBED_EXTENSIONS = frozenset(("exr", "png", "tif", "tiff", "jpg", "jpeg", "tga"))
+
+JPEG_FRAME_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def image_info(image_format: str, width: int, height: int, bit_depth: int, channels: int, is_float: bool) -> dict:
+    """
+    Makes the dictionary that describes one image
+    """
+    return {
+        "format": image_format,
+        "width": width,
+        "height": height,
+        "bitDepth": bit_depth,
+        "channels": channels,
+        "float": is_float,
+    }
+
+
+def read_exr(image_file, header: bytes) -> dict:
+    """
+    Reads the channels and the data window of the first part of an EXR
+    """
+    if len(header) == HEADER_SIZE:
+        header += image_file.read(16 * HEADER_SIZE)
+
+    position = 8
+    channels = []
+    data_window = None
+
+    while position < len(header) and header[position] != 0:
+        name_end = header.index(b"\0", position)
+        name = header[position:name_end]
+        type_end = header.index(b"\0", name_end + 1)
+        size = struct.unpack_from("<i", header, type_end + 1)[0]
+        value = type_end + 5
+
+        if name == b"channels":
+            channel = value
+            while header[channel] != 0:
+                channel_end = header.index(b"\0", channel)
+                channels.append(struct.unpack_from("<i", header, channel_end + 1)[0])
+                channel = channel_end + 17
+        elif name == b"dataWindow":
+            data_window = struct.unpack_from("<4i", header, value)
+
+        position = value + size
+
+    if not channels or data_window is None:
+        return None
+
+    bit_depth, is_float = max(EXR_PIXEL_TYPES.get(pixel_type, (32, True)) for pixel_type in channels)
+    x_min, y_min, x_max, y_max = data_window
+    return image_info("exr", x_max - x_min + 1, y_max - y_min + 1, bit_depth, len(channels), is_float)
+
+
+def read_png(image_file, header: bytes) -> dict:
+    """
+    Reads the IHDR chunk of a PNG
+    """
+    width, height, bit_depth, color_type = struct.unpack_from(">IIBB", header, 16)
+    return image_info("png", width, height, bit_depth, PNG_CHANNELS.get(color_type, 3), False)
+
+
+def read_tiff(image_file, header: bytes) -> dict:
+    """
+    Reads the tags of the first image of a TIFF
+    """
+    order = "<" if header[:2] == b"II" else ">"
+
+    def read_at(offset: int, size: int) -> bytes:
+        if offset + size <= len(header):
+            return header[offset:offset + size]
+        image_file.seek(offset)
+        return image_file.read(size)
+
+    ifd_offset = struct.unpack(f"{order}I", read_at(4, 4))[0]
+    entry_count = struct.unpack(f"{order}H", read_at(ifd_offset, 2))[0]
+    entries = read_at(ifd_offset + 2, entry_count * 12)
+
+    tags = {}
+    for i in range(entry_count):
+        tag, value_type, count = struct.unpack_from(f"{order}HHI", entries, i * 12)
+        if tag not in TIFF_TAGS or value_type not in TIFF_TYPES or count == 0:
+            continue
+        #Values that fit in four bytes are stored in the entry, the others at an offset, only the first one is read
+        value_format = f"{order}{TIFF_TYPES[value_type]}"
+        value_size = struct.calcsize(value_format)
+        if value_size * count > 4:
+            offset = struct.unpack_from(f"{order}I", entries, i * 12 + 8)[0]
+            value = read_at(offset, value_size)
+        else:
+            value = entries[i * 12 + 8:i * 12 + 8 + value_size]
+        tags[tag] = struct.unpack(value_format, value)[0]
+
+    if 256 not in tags or 257 not in tags:
+        return None
+
+    #SampleFormat 3 is floating point
+    return image_info("tif", tags[256], tags[257], tags.get(258, 1), tags.get(277, 1), tags.get(339, 1) == 3)
+
+
+def read_jpeg(image_file, header: bytes) -> dict:
+    """
+    Walks the JPEG markers until the frame header
+    """
+    image_file.seek(2)
+
+    while True:
+        marker = image_file.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+
+        if marker[1] == 0xFF:
+            image_file.seek(-1, os.SEEK_CUR)
+            continue
+        if 0xD0 <= marker[1] <= 0xD9 or marker[1] == 0x01:
+            continue
+
+        length = struct.unpack(">H", image_file.read(2))[0]
+
+        if marker[1] in JPEG_FRAME_MARKERS:
+            bit_depth, height, width, channels = struct.unpack(">BHHB", image_file.read(6))
+            return image_info("jpg", width, height, bit_depth, channels, False)
+
+        image_file.seek(length - 2, os.SEEK_CUR)
+
+
+def read_tga(image_file, header: bytes) -> dict:
+    """
+    Reads the fixed TGA header
+    """
+    image_type = header[2]
+    width, height, pixel_depth, descriptor = struct.unpack_from("<HHBB", header, 12)
+    alpha_bits = descriptor & 0x0F
+
+    if image_type in (3, 11):
+        channels = 2 if pixel_depth == 16 else 1
+    elif image_type in (1, 9):
+        channels = 3
+    else:
+        channels = 4 if pixel_depth == 32 or alpha_bits else 3
+
+    return image_info("tga", width, height, 8, channels, False)
+
+
+def probe_image(filepath: str) -> dict:
+    """
+    Reads the header of an image
+    Returns the format, resolution, bit depth, channel count and if it is float, or None when it can't be read
+    """
+    try:
+        with open(filepath, "rb") as image_file:
+            header = image_file.read(HEADER_SIZE)
+
+            if header[:4] == b"\x76\x2f\x31\x01":
+                return read_exr(image_file, header)
+            if header[:8] == b"\x89PNG\r\n\x1a\n":
+                return read_png(image_file, header)
+            if header[:4] in (b"II*\0", b"MM\0*"):
+                return read_tiff(image_file, header)
+            if header[:2] == b"\xff\xd8":
+                return read_jpeg(image_file, header)
+            if filepath.lower().endswith(".tga") and len(header) >= 18:
+                return read_tga(image_file, header)
+    except (OSError, ValueError, IndexError, struct.error):
+        pass
+
+    return None
+
+
+def probe_images(filepaths, workers: int = core.IO_WORKERS) -> dict:
+    """
+    Reads the headers of many images at once on a thread pool
+    Returns the image info by path
+    """
+    filepaths = list(filepaths)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(filepaths, executor.map(probe_image, filepaths)))
+
+
+def pick_linear_color_space(color_spaces=None) -> str:
+    """
+    Returns the linear color space Maya knows, None if there is none
+    """
+    for color_space in LINEAR_COLOR_SPACES:
+        if color_spaces is None or color_space in color_spaces:
+            return color_space
+    return None
+
+
+def suggest_settings(texture_type: str, details: dict, info: dict, linear_color_space: str = None):
+    """
+    Works out the color space and alphaIsLuminance of a texture from its header
+    Returns the color space, alphaIsLuminance and a list of warnings
+    """
+    color_space = details["colorSpace"]
+    alpha_is_luminance = details["enableAlphaIsLuminance"]
+    warnings = []
+    filename = os.path.basename(details["filePath"])
+    if "channels" in details:
+        #Packed maps are read channel by channel, only an alpha the layout reads matters
+        alpha_target = details["channels"].get("A")
+        if alpha_target is not None and info["channels"] in (1, 3):
+            warnings.append(f"{filename} has no alpha channel for {alpha_target}")
+        return color_space, alpha_is_luminance, warnings
+
+    is_color = details["connectType"].lower() == "color"
+    is_gray = info["channels"] <= 2
+
+    if info["float"]:
+        #Float images are stored linear, sRGB on them is nearly always a mistake
+        if is_color and color_space != RAW_COLOR_SPACE and texture_type != "normal":
+            if linear_color_space is not None:
+                color_space = linear_color_space
+            else:
+                warnings.append(f"{filename} is a {info['bitDepth']} bit float image but uses {color_space}")
+    elif is_gray and info["bitDepth"] >= 16:
+        #Single channel 16 bit images are data
+        color_space = RAW_COLOR_SPACE
+
+    if is_gray and not is_color:
+        alpha_is_luminance = True
+
+    if texture_type == "normal" and is_gray:
+        warnings.append(f"{filename} is used as a normal map but has only {info['channels']} channel")
+    if not is_color and info["channels"] == 4 and not alpha_is_luminance:
+        warnings.append(f"{filename} has an alpha channel that will be used for {texture_type}")
+
+    return color_space, alpha_is_luminance, warnings
+
+
+def apply_probe(texture_maps: dict, color_spaces=None, workers: int = core.IO_WORKERS) -> list:
+    """
+    Reads the headers of all the textures and updates their color space and alphaIsLuminance
+    Tiled textures are read from their first tile, every entry keeps what was read under "image"
+    Formats the probe can't read, like .psd or .tx, are left alone without a warning
+    Returns the warnings about files that look wrong
+    """
+    def first_file(details: dict) -> str:
+        return details["tiles"][0] if "tiles" in details else details["filePath"]
+
+    entries = [(texture_type, details) for texture_type, details in core.texture_entries(texture_maps)
+               if first_file(details).rpartition(".")[2].lower() in PROBED_EXTENSIONS]
+
+    with timing.phase("probe"):
+        infos = probe_images({first_file(details) for texture_type, details in entries}, workers)
+    linear_color_space = pick_linear_color_space(color_spaces)
+    warnings = []
+
+    for texture_type, details in entries:
+        info = infos.get(first_file(details))
+        if info is None:
+            warnings.append(f"Couldn't read the header of {os.path.basename(details['filePath'])}")
+            continue
+
+        details["image"] = info
+        details["colorSpace"], details["enableAlphaIsLuminance"], texture_warnings = suggest_settings(
+            texture_type, details, info, linear_color_space)
+        warnings.extend(texture_warnings)
+
+    return warnings
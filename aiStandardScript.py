@@ -1,13 +1,279 @@
 #Jaroslav Lajta
 
 import os
-import json
+import copy
+import threading
 from maya import cmds
-from PySide6.QtWidgets import QLabel, QLineEdit, QHBoxLayout, QPushButton,QFileDialog,QComboBox,QFrame
+from PySide6.QtWidgets import QLabel, QLineEdit, QHBoxLayout, QPushButton,QFileDialog,QComboBox,QFrame,QCheckBox
+from PySide6.QtWidgets import QTableView, QStyledItemDelegate, QHeaderView, QAbstractItemView, QProgressBar
 from PySide6 import QtWidgets, QtCore
 from PySide6.QtCore import Qt
 import re
 
+import aiStandardCore as core
+import aiStandardCache as cache
+import aiStandardProbe as probe
+import aiStandardTx as tx
+import aiStandardNetwork as network
+import aiStandardTiming as timing
+import aiStandardManifest as manifest
+import aiStandardDedup as dedup
+import aiStandardAudit as audit
+import aiStandardAssign as assign
+
+
+def format_camel_case(text:str):
+    """
+    Formats title
+    """
+    formatted = re.sub(r'(?<!^)(?=[A-Z])', ' ', text)
+    return formatted.title()
+
+
+class TextureTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model over the found texture maps, one row per texture type
+    The color space and normal map choices are written straight into the texture maps
+    """
+
+    COLUMNS = ["Texture", "File", "Color Space", "Normal Type"]
+    TEXTURE_COLUMN, FILE_COLUMN, COLOR_SPACE_COLUMN, NORMAL_TYPE_COLUMN = range(4)
+
+    def __init__(self, parent=None):
+        super(TextureTableModel, self).__init__(parent)
+        self.texture_maps = {}
+        self.texture_types = []
+        self.normal_type = None
+
+    def set_texture_maps(self, texture_maps:dict):
+        """
+        Shows new texture maps, the view keeps its widgets
+        """
+        self.beginResetModel()
+        self.texture_maps = texture_maps
+        self.texture_types = list(texture_maps)
+        self.normal_type = core.pick_normal_type(texture_maps.get("normal", {}), self.normal_type)
+        self.endResetModel()
+
+    def normal_types(self):
+        """
+        Normal map variants that were found
+        """
+        return list(self.texture_maps.get("normal", {}))
+
+    def details(self, row:int):
+        """
+        Details of the texture in a row, for the normal map the ones of the chosen variant
+        """
+        texture_type = self.texture_types[row]
+        if texture_type == "normal":
+            return self.texture_maps["normal"][self.normal_type]
+        return self.texture_maps[texture_type]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.texture_types)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        texture_type = self.texture_types[index.row()]
+        details = self.details(index.row())
+        column = index.column()
+
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column == self.TEXTURE_COLUMN:
+                return format_camel_case(texture_type)
+            if column == self.FILE_COLUMN:
+                label = os.path.basename(details["filePath"])
+                if "tiles" in details:
+                    label += f" ({len(details['tiles'])} tiles)"
+                return label
+            if column == self.COLOR_SPACE_COLUMN:
+                return details["colorSpace"]
+            if column == self.NORMAL_TYPE_COLUMN and texture_type == "normal":
+                return self.normal_type
+        elif role == Qt.ToolTipRole and column == self.FILE_COLUMN:
+            if "originalPath" in details:
+                return f"{details['originalPath']} is the same image as {details['filePath']}"
+            return details["filePath"]
+        elif role == Qt.ToolTipRole and column == self.TEXTURE_COLUMN and "channels" in details:
+            #Packed maps show which input every channel drives
+            return ", ".join(f"{channel}: {format_camel_case(target) if target else 'unused'}"
+                             for channel, target in details["channels"].items())
+
+        return None
+
+    def flags(self, index):
+        flags = super(TextureTableModel, self).flags(index)
+        if not index.isValid():
+            return flags
+
+        if index.column() == self.COLOR_SPACE_COLUMN:
+            flags |= Qt.ItemIsEditable
+        elif index.column() == self.NORMAL_TYPE_COLUMN and self.texture_types[index.row()] == "normal" and len(self.normal_types()) > 1:
+            flags |= Qt.ItemIsEditable
+
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+
+        texture_type = self.texture_types[index.row()]
+
+        if index.column() == self.COLOR_SPACE_COLUMN:
+            if texture_type == "normal":
+                #One color space for all the normal map variants
+                for normal_details in self.texture_maps["normal"].values():
+                    normal_details["colorSpace"] = value
+            else:
+                self.texture_maps[texture_type]["colorSpace"] = value
+        elif index.column() == self.NORMAL_TYPE_COLUMN and value in self.normal_types():
+            self.normal_type = value
+        else:
+            return False
+
+        self.dataChanged.emit(self.index(index.row(), 0), self.index(index.row(), len(self.COLUMNS) - 1))
+        return True
+
+
+class ComboBoxDelegate(QStyledItemDelegate):
+    """
+    Makes a combo box only while a cell is edited
+    All the color space combo boxes share one list model instead of each getting every color space
+    """
+
+    def __init__(self, color_space_model, parent=None):
+        super(ComboBoxDelegate, self).__init__(parent)
+        self.color_space_model = color_space_model
+
+    def createEditor(self, parent, option, index):
+        editor = QComboBox(parent)
+        if index.column() == TextureTableModel.COLOR_SPACE_COLUMN:
+            editor.setModel(self.color_space_model)
+        else:
+            editor.addItems(index.model().normal_types())
+
+        editor.activated.connect(lambda: self.commit_and_close(editor))
+        return editor
+
+    def commit_and_close(self, editor):
+        """
+        Saves the choice as soon as it is picked
+        """
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)
+
+    def setEditorData(self, editor, index):
+        found = editor.findText(index.data(Qt.EditRole))
+        if found != -1:
+            editor.setCurrentIndex(found)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText(), Qt.EditRole)
+
+
+class ScanSignals(QtCore.QObject):
+    """
+    Signals of a scan, made on the main thread so they are delivered there
+    """
+    progress = QtCore.Signal(str)
+    found = QtCore.Signal(object)
+    finished = QtCore.Signal(object, object)
+    failed = QtCore.Signal(str)
+
+
+class ScanWorker(QtCore.QRunnable):
+    """
+    Scans and classifies a directory on a thread of the pool, so Maya stays responsive
+    What is found so far is sent to the window while the scan goes on, cancel stops it between folders
+    Everything that needs Maya, like the color spaces and the converter, is read on the main thread before it starts
+    """
+
+    def __init__(self, folder_directory:str, shader_config, file_format, scan_cache, recursive:bool,
+                 color_spaces=None, make_tx:bool = False, converter:str = None, split_sets:bool = False, hash_cache=None):
+        super(ScanWorker, self).__init__()
+        self.setAutoDelete(False)
+        self.folder_directory = folder_directory
+        self.shader_config = shader_config
+        self.file_format = file_format
+        self.scan_cache = scan_cache
+        self.recursive = recursive
+        self.color_spaces = color_spaces
+        self.make_tx = make_tx
+        self.converter = converter
+        self.split_sets = split_sets
+        self.hash_cache = hash_cache
+        self.cancelled = threading.Event()
+        #Set when run returns, after the last write to the caches
+        self.done = threading.Event()
+        self.signals = ScanSignals()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def wait(self):
+        self.done.wait()
+
+    def run(self):
+        try:
+            with timing.run("load_files"):
+                texture_sets = None
+                for texture_sets, warnings, folders, files in core.iter_texture_maps(
+                        self.folder_directory, self.shader_config, self.file_format, recursive=self.recursive,
+                        cache=self.scan_cache, cancelled=self.cancelled.is_set, split_sets=self.split_sets):
+                    #The window always gets texture sets, without splitting there is only the set ""
+                    if not self.split_sets:
+                        texture_sets = {"": texture_sets} if texture_sets else {}
+                    self.signals.progress.emit(f"Scanning: {folders} folders, {files} files")
+                    #The window gets its own copy, the headers are still read into these ones
+                    self.signals.found.emit(copy.deepcopy(texture_sets))
+
+                if texture_sets is None or self.cancelled.is_set():
+                    return
+
+                #Before the headers are read, so every image is only read once
+                if self.hash_cache is not None:
+                    self.signals.progress.emit("Finding identical textures")
+                    dedup.apply_dedup(texture_sets.values(), self.hash_cache)
+
+                if self.color_spaces is not None:
+                    self.signals.progress.emit("Reading the image headers")
+                    for texture_maps in texture_sets.values():
+                        warnings.extend(probe.apply_probe(texture_maps, self.color_spaces))
+
+                if self.make_tx and not self.cancelled.is_set():
+                    self.signals.progress.emit("Converting to .tx")
+                    for texture_maps in texture_sets.values():
+                        warnings.extend(tx.apply_tx(texture_maps, self.converter))
+
+                try:
+                    self.scan_cache.save()
+                    if self.hash_cache is not None:
+                        self.hash_cache.save()
+                except OSError:
+                    warnings.append("Couldn't save the scan cache")
+
+                timing.note(folder=self.folder_directory, textures=sum(len(texture_maps) for texture_maps in texture_sets.values()),
+                            sets=len(texture_sets))
+
+            if not self.cancelled.is_set():
+                self.signals.finished.emit(texture_sets, warnings)
+
+        #Nothing raised here would reach Maya, so it is sent to the window
+        except Exception as error:
+            self.signals.failed.emit(str(error))
+        finally:
+            self.done.set()
 
 
 class ShaderCreator(QtWidgets.QMainWindow):
@@ -32,17 +298,28 @@ class ShaderCreator(QtWidgets.QMainWindow):
             self.folder_directory = "None"
 
 
-            #Supported all file formats as in https://help.autodesk.com/view/MAYAUL/2024/ENU/?guid=GUID-BF7C7484-C7F6-48C6-9092-7E6EB373B312
-            self.file_format = ["psd","als","avi","dds","gif","jpg","cin","iff","jpeg","exr","png","eps","yuv","pic","hdr","sgi","tim","tga","tif","rla","bmp","xpm"]
+            #Supported all file formats
+            self.file_format = core.FILE_FORMATS
+            #Texture maps of every texture set by set name, the table shows the ones of the chosen set
+            self.texture_sets = {}
             self.texture_maps = {}
-
-            #List off all the possible input spaces
-            self.COLOR_SPACES = cmds.colorManagementPrefs(query=True, inputSpaceNames=True)
-
-            #SubLayout
-            self.sub_layout = None
-            self.scroll_area = None
+            self.scan_cache = cache.ScanCache(self.matcher)
+            #Read the first time identical textures are looked for
+            self.hash_cache = None
+
+            #Texture table, made when the first textures are found
+            #The color spaces are only asked from Maya when they are needed
+            self.texture_model = TextureTableModel()
+            self.color_space_model = QtCore.QStringListModel()
+            self.texture_table = None
+            self.texture_set_box = None
             self.create_shader_button = None
+            self.scan_worker = None
+
+            #Plan and node names of the last shaders by texture set, kept so watching can update them
+            self.built_shaders = {}
+            #The next scan comes from the watcher and keeps what was chosen in the table
+            self.merge_next_scan = False
 
             #Name of the shader
             self.shader_name_field = self.add_text_field(label='Shader Name', label_w=100, label_h=50, box_w=300)
@@ -51,10 +328,51 @@ class ShaderCreator(QtWidgets.QMainWindow):
             #File directory button
             self.dialogButton = self.add_button("CHOOSE FILE DIRECTORY", "Choose a file directory where all the texture maps are located")
             self.directory_text = self.add_text_label(f"Directory: {self.folder_directory}","No Directory selected",False)
+            self.rescan_button = self.add_button("RESCAN DIRECTORY", "Forgets what is remembered about the directory and loads it again")
+            self.manifest_button = self.add_button("BUILD FROM MANIFESTS", "Builds the materials saved in manifests without scanning their directories")
+            self.check_manifest_check_box = self.add_check_box("Check manifest textures", "Warns about textures that are missing or changed since the manifest was saved")
+            self.audit_button = self.add_button("AUDIT SCENE", "Warns about file nodes of the shaders in the scene that read missing, empty or stale files or use the wrong color space")
+            self.fix_audit_check_box = self.add_check_box("Fix color spaces", "The audit sets the expected color space on the file nodes that don't have one of them")
+            self.subfolders_check_box = self.add_check_box("Include subfolders", "Also loads the textures inside the subfolders of the directory")
+            self.split_sets_check_box = self.add_check_box("Split into texture sets", "Makes a shader for every texture set, like Body_BaseColor and Head_BaseColor")
+
+            #Shown while a directory is scanned in the background
+            self.scan_text = self.add_text_label("", "What the scan is doing", True)
+            self.scan_progress = self.add_progress_bar()
+            self.cancel_button = self.add_button("CANCEL SCAN", "Stops loading the directory")
+            self.show_scan(False)
+
+            self.probe_check_box = self.add_check_box("Detect color spaces from the files", "Reads the image headers to pick the color space and alpha settings")
+            self.probe_check_box.setChecked(True)
+            self.tx_check_box = self.add_check_box("Convert to .tx", "Makes tiled, mipmapped .tx files with maketx and uses them in the shader")
+            self.shared_placement_check_box = self.add_check_box("Share one place2dTexture", "One place2dTexture node drives all the file nodes of the shader")
+            self.shared_placement_check_box.setChecked(True)
+            self.reuse_check_box = self.add_check_box("Reuse file nodes in the scene", "Connects file nodes that already read the same texture instead of making new ones")
+            self.reuse_check_box.setChecked(True)
+            self.update_existing_check_box = self.add_check_box("Update the existing shader", "Changes the network of a shader with the same name to match the textures instead of making a second one")
+            self.templates_check_box = self.add_check_box("Clone networks with the same layout", "Duplicates a shader made before with the same nodes and only sets its files and names")
+            self.assign_check_box = self.add_check_box("Assign to matching meshes", "Assigns every shader made to the meshes named like its texture set or shader, like Body_geo for Body")
+            self.dedup_check_box = self.add_check_box("Share identical textures", "Images saved under different names with the same content are loaded by one file node")
+            self.watch_check_box = self.add_check_box("Watch the directory", "Loads the textures again when files are added, removed or renamed")
+            self.update_shader_check_box = self.add_check_box("Update the shader when textures change", "Changes the last created shader to match the watched directory")
+
+            #Changes come in bursts while textures are exported, they are loaded once things are quiet
+            self.watcher = QtCore.QFileSystemWatcher(self)
+            self.watch_timer = QtCore.QTimer(self)
+            self.watch_timer.setSingleShot(True)
+            self.watch_timer.setInterval(500)
 
             self.add_separator()
 
             self.dialogButton.clicked.connect(self.add_file_window)
+            self.rescan_button.clicked.connect(self.rescan_directory)
+            self.manifest_button.clicked.connect(self.build_from_manifests)
+            self.audit_button.clicked.connect(self.audit_scene)
+            self.cancel_button.clicked.connect(self.cancel_scan)
+            self.watch_check_box.toggled.connect(self.update_watch)
+            self.split_sets_check_box.toggled.connect(self.reload_directory)
+            self.watcher.directoryChanged.connect(lambda path: self.watch_timer.start())
+            self.watch_timer.timeout.connect(self.reload_changed)
         else:
             pass
 
@@ -62,14 +380,6 @@ class ShaderCreator(QtWidgets.QMainWindow):
 
 
 
-    def format_camel_case(self,text:str):
-        """
-        Formats title
-        """
-        formatted = re.sub(r'(?<!^)(?=[A-Z])', ' ', text)
-        return formatted.title()
-
-
     def add_separator(self):
 
         """
@@ -82,17 +392,6 @@ class ShaderCreator(QtWidgets.QMainWindow):
         self.main_layout.addWidget(separator)
 
 
-    def add_separator_sublayout(self):
-        """
-        Same function but only for the sub layout
-        """
-        separator = QFrame()
-        separator.setFrameShape(QFrame.HLine)
-        separator.setFrameShadow(QFrame.Sunken)
-        separator.setLineWidth(1)
-        self.sub_layout.addWidget(separator)
-
-
     def add_file_window(self):
 
         #Saves the directory inside a variable
@@ -103,263 +402,260 @@ class ShaderCreator(QtWidgets.QMainWindow):
         else:
             self.directory_text.setText(f"Directory: {self.folder_directory}")
             self.directory_text.setToolTip("Directory Selected")
+            self.built_shaders = {}
+            self.merge_next_scan = False
             self.load_files()
 
 
-    def load_files(self):
+    def reload_directory(self):
         """
-        Loads all the respectable files, filters and saves them to a dictionary
-
+        Loads the directory again from the scan cache, after the texture sets are split or joined
         """
+        if self.folder_directory != "None":
+            self.built_shaders = {}
+            self.merge_next_scan = False
+            self.load_files()
 
-        # LOADING OF FILES
-
-        self.texture_maps = {}
-        all_files = set()
-        only_images = set()
-        all_images = set()
-
-        for item in os.listdir(self.folder_directory):
-            if os.path.isfile(f'{self.folder_directory}/{item}'):
-                all_files.add(f'{self.folder_directory}/{item}')
-
-
-
-
-        # Keep only files with chosen extensions
-
-        for file in all_files:
-            for file_type in self.file_format:
-                if file.split('.')[-1].lower() == file_type:
-                    only_images.add(file)
-                    break
-
-        # Just to show files that aren't images
-        non_images = all_files.difference(only_images)
-
-        for file in non_images:
-            self.raise_warning(f"{os.path.basename(file)} doesn't have an acceptable extension!")
-
-        config = self.shader_config["textures"]
-
-
-
-        for filepath in only_images:
-            filename = os.path.basename(filepath).lower()
-            filename_split = os.path.splitext(filename)[0].split("_")
-
-
-            for part in filename_split:
-                for texture_type, data in config.items():
-                    if part.lower() == texture_type.lower():
-
-                        all_images.add(filepath)
-
-                        if part.lower() == "normal":
-                            self.texture_maps[texture_type] = self.texture_maps.get(texture_type, {})
-
-                            if "directx" in filename.lower():
-
-
-                                self.texture_maps[texture_type]["DirectX"] = {
-                                    "filePath": filepath,
-                                    "colorSpace": data["colorSpace"],
-                                    "connectType": data["connectType"],
-                                    "enableAlphaIsLuminance": data["enableAlphaIsLuminance"],
-                                }
-                                break
-                            elif "opengl" in filename.lower():
-                                self.texture_maps[texture_type]["OpenGL"] = {
-                                    "filePath": filepath,
-                                    "colorSpace": data["colorSpace"],
-                                    "connectType": data["connectType"],
-                                    "enableAlphaIsLuminance": data["enableAlphaIsLuminance"],
-                                }
-
-                                break
-                            else:
-                                self.texture_maps[texture_type]["Undefined"] = {
-                                    "filePath": filepath,
-                                    "colorSpace": data["colorSpace"],
-                                    "connectType": data["connectType"],
-                                    "enableAlphaIsLuminance": data["enableAlphaIsLuminance"],
-                                }
-
-                                break
-                        else:
-
-                            self.texture_maps[texture_type] = {
-
-                                "filePath": filepath,
-
-                                "colorSpace": data["colorSpace"],
-
-                                "connectType": data["connectType"],
 
-                                "enableAlphaIsLuminance": data["enableAlphaIsLuminance"],
+    def rescan_directory(self):
+        """
+        Throws away the cached scan of the directory and loads it again
+        A scan that is still running is stopped first, so it can't put the old listing back into the cache
+        """
+        if self.folder_directory != "None":
+            self.cancel_scan(wait=True)
+            self.scan_cache.invalidate(self.folder_directory)
+            self.load_files()
 
-                            }
 
-                            break
+    def load_files(self):
+        """
+        Loads all the respectable files, filters and saves them to a dictionary
+        The directory is scanned in the background, a scan that is still running is cancelled first
+        """
+        self.cancel_scan()
 
+        color_spaces = network.color_spaces() if self.probe_check_box.isChecked() else None
 
+        make_tx = self.tx_check_box.isChecked()
+        converter = tx.find_converter() if make_tx else None
+        if make_tx and converter is None:
+            self.raise_warning(f"{tx.CONVERTER_NAME} wasn't found, the textures won't be converted to .tx")
+            make_tx = False
 
+        if self.dedup_check_box.isChecked() and self.hash_cache is None:
+            self.hash_cache = cache.HashCache()
+        hash_cache = self.hash_cache if self.dedup_check_box.isChecked() else None
 
+        worker = ScanWorker(self.folder_directory, self.shader_config, self.file_format, self.scan_cache,
+                            self.subfolders_check_box.isChecked(), color_spaces, make_tx, converter,
+                            self.split_sets_check_box.isChecked(), hash_cache)
+        worker.signals.progress.connect(lambda text: self.show_progress(worker, text))
+        worker.signals.found.connect(lambda texture_sets: self.show_found(worker, texture_sets))
+        worker.signals.finished.connect(lambda texture_sets, warnings: self.scan_finished(worker, texture_sets, warnings))
+        worker.signals.failed.connect(lambda error: self.scan_failed(worker, error))
 
+        self.scan_worker = worker
+        self.scan_text.setText("Scanning")
+        self.show_scan(True)
+        QtCore.QThreadPool.globalInstance().start(worker)
 
-        not_usable_images = all_files.difference(non_images)
-        not_usable_images = not_usable_images.difference(all_images)
 
+    def cancel_scan(self, wait:bool = False):
+        """
+        Stops the scan that is running, what it finds after this is ignored
+        wait blocks until the scan has returned, it stops between folders
+        """
+        if self.scan_worker is not None:
+            self.scan_worker.cancel()
+            if wait:
+                self.scan_worker.wait()
+            self.scan_worker = None
+            self.show_scan(False)
 
 
-        for file in not_usable_images:
-            self.raise_warning(f"{os.path.basename(file)} are not usable for the Shader!")
+    def show_scan(self, scanning:bool):
+        """
+        Shows the progress of a scan, the shader can't be created until it is done
+        """
+        self.scan_text.setVisible(scanning)
+        self.scan_progress.setVisible(scanning)
+        self.cancel_button.setVisible(scanning)
+        if self.create_shader_button is not None:
+            self.create_shader_button.setEnabled(not scanning and len(self.texture_sets) > 0)
+            self.save_manifest_button.setEnabled(not scanning and len(self.texture_sets) > 0)
 
 
+    def show_progress(self, worker, text:str):
+        """
+        Shows what the scan is doing
+        """
+        if worker is self.scan_worker:
+            self.scan_text.setText(text)
 
-        if len(self.texture_maps) == 0:
-            self.raise_warning("Didn't find any usable files")
-        else:
 
+    def show_found(self, worker, texture_sets:dict):
+        """
+        Shows the textures found so far, the table isn't emptied while a watched directory is loaded again
+        """
+        if worker is self.scan_worker and not self.merge_next_scan:
+            self.texture_sets = texture_sets
             self.update_ui()
+            self.show_scan(True)
 
 
-    def update_ui(self):
+    @timing.run("show_textures")
+    def scan_finished(self, worker, texture_sets:dict, warnings:list):
         """
-                Updates the UI to display texture type, color space dropdown, and filename
-                """
-        # Removes additional UI if it exists so it can be readded, also removes button, so it always stay on bottom
-        if self.sub_layout != None:
-            self.main_layout.removeItem(self.sub_layout)
-            self.main_layout.removeWidget(self.scroll_area)
-            self.scroll_area.deleteLater()
-            self.scroll_area = None
-
-            while self.sub_layout.count():
-                item = self.sub_layout.takeAt(0)
-                if item.widget():
-                    item.widget().deleteLater()
-                elif item.layout():
-                    item.layout().deleteLater()
-            if self.create_shader_button != None:
-                self.create_shader_button.deleteLater()
-                self.create_shader_button = None
-
-        # Sublayout that gets added for the files and colorspaces
-        self.sub_layout = QtWidgets.QVBoxLayout()
-        sub_widget = QtWidgets.QWidget()
-        sub_widget.setLayout(self.sub_layout)
-
-        # Wrap the sub_layout in a QScrollArea
-        self.scroll_area = QtWidgets.QScrollArea()
-        self.scroll_area.setWidget(sub_widget)
-        self.scroll_area.setMinimumHeight(200)
-
-        self.scroll_area.setWidgetResizable(True)
-
-        self.main_layout.addWidget(self.scroll_area)
-
-        # Creating UI elements to display to a user and to select ColorSpace
-        only_one_normal = True
-
-        for texture_type, data in self.texture_maps.items():
-
-            if texture_type == "normal":
-
-                self.add_text_label_sublayout(f"Texture: Normal", "", True)
-
-                if len(data) == 1:
-
-                    directx_opengl_selector = QComboBox()
-                    found_normals = []
-                    for normal_type in data:
-                        found_normals.append(normal_type)
-
-                    directx_opengl_selector.addItems(found_normals)
-                    data["normal_selector"] = directx_opengl_selector
-
+        Shows the textures once the scan, the header reads and the conversions are done
+        """
+        if worker is not self.scan_worker:
+            return
 
-                    self.add_text_label_sublayout("Normal Map Type:", "", True)
-                    directx_opengl_selector.setDisabled(True)
-                    self.sub_layout.addWidget(directx_opengl_selector)
+        self.scan_worker = None
+        if self.merge_next_scan:
+            self.texture_sets = {set_name: core.merge_texture_maps(self.texture_sets.get(set_name, {}), texture_maps)
+                                 for set_name, texture_maps in texture_sets.items()}
+        else:
+            self.texture_sets = texture_sets
 
+        for msg in warnings:
+            self.raise_warning(msg)
 
+        if len(self.texture_sets) == 0:
+            self.raise_warning("Didn't find any usable files")
 
-                else:
-                    directx_opengl_selector = QComboBox()
-                    found_normals = []
-                    for normal_type in data:
-                        found_normals.append(normal_type)
+        self.update_ui()
+        self.show_scan(False)
 
-                    directx_opengl_selector.addItems(found_normals)
-                    data["normal_selector"] = directx_opengl_selector
+        if self.merge_next_scan and self.update_shader_check_box.isChecked():
+            self.update_shader()
+        self.merge_next_scan = False
+        self.update_watch()
 
 
-                    self.add_text_label_sublayout("Select Normal Map Type:", "", True)
-                    self.sub_layout.addWidget(directx_opengl_selector)
+    def update_watch(self):
+        """
+        Watches the directory, and the subfolders that were loaded with it, while Watch the directory is ticked
+        """
+        watched = self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
 
-                color_space_selector = QComboBox()
-                color_space_selector.addItems(self.COLOR_SPACES)
+        if self.watch_check_box.isChecked() and self.folder_directory != "None":
+            if self.subfolders_check_box.isChecked():
+                self.watcher.addPaths(self.scan_cache.cached_folders(self.folder_directory))
+            else:
+                self.watcher.addPath(self.folder_directory)
 
-                for map_type in ["directx", "opengl", "undefined"]:
-                    for normal_type, normal_data in data.items():
 
-                        if normal_type.lower() == map_type:
+    def reload_changed(self):
+        """
+        Loads the watched directory again, the scan cache only lists the folders that changed
+        """
+        if self.folder_directory != "None" and os.path.isdir(self.folder_directory):
+            self.merge_next_scan = True
+            self.load_files()
 
-                            filename = os.path.basename(data[normal_type]["filePath"])
-                            self.add_text_label_sublayout(f"File: {filename}", "", True)
-                            color_space_index = color_space_selector.findText(data[normal_type]["colorSpace"])
 
+    @timing.run("update_shader")
+    def update_shader(self):
+        """
+        Changes the last created shaders to match the texture maps, only what differs is touched
+        Texture sets that weren't built, or whose shader was deleted, are left alone
+        """
+        index = network.file_index() if self.reuse_check_box.isChecked() else None
 
+        for set_name, (plan, names) in list(self.built_shaders.items()):
+            texture_maps = self.texture_sets.get(set_name)
+            if not texture_maps:
+                continue
+            if not cmds.objExists(names["shader"]):
+                del self.built_shaders[set_name]
+                continue
 
+            new_plan = network.plan_shader_network(plan.shader_name, texture_maps, self.texture_model.normal_type,
+                                                   self.shared_placement_check_box.isChecked())
+            self.built_shaders[set_name] = (new_plan, network.patch_plan(plan, names, new_plan, warn=self.raise_warning,
+                                                                         index=index))
 
-                if color_space_index != -1:
-                    color_space_selector.setCurrentIndex(color_space_index)
 
-                data["ui_colorSpace"] = color_space_selector
-                # Add the color space drop-down to the layout
-                self.add_text_label_sublayout("Color Space:", "", True)
-                self.sub_layout.addWidget(color_space_selector)
-                self.add_separator_sublayout()
+    def scan_failed(self, worker, error:str):
+        """
+        Tells why the directory couldn't be loaded
+        """
+        if worker is self.scan_worker:
+            self.scan_worker = None
+            self.show_scan(False)
+            self.raise_warning(f"Couldn't load {self.folder_directory}: {error}")
 
-            else:
 
-                texture_display_name = self.format_camel_case(texture_type)
+    def closeEvent(self, event):
+        self.cancel_scan()
+        super(ShaderCreator, self).closeEvent(event)
 
-                # texture_display_name = texture_display_name.title()
 
-                self.add_text_label_sublayout(f"Texture: {texture_display_name}", "", True)
+    @timing.phase("ui")
+    def update_ui(self):
+        """
+        Shows the texture maps in the table
+        The table and the button are made the first time there are textures, after that only the model is refreshed
+        """
+        if self.texture_table is None:
+            if len(self.texture_sets) == 0:
+                return
+
+            self.texture_set_box = self.add_combo_box("Texture Set", "Choose which texture set the table shows")
+            self.texture_set_box.currentTextChanged.connect(self.show_texture_set)
+
+            self.texture_table = QTableView()
+            self.texture_table.setModel(self.texture_model)
+            self.texture_table.setItemDelegate(ComboBoxDelegate(self.color_space_model, self.texture_table))
+            self.texture_table.setEditTriggers(QAbstractItemView.AllEditTriggers)
+            self.texture_table.setSelectionMode(QAbstractItemView.NoSelection)
+            self.texture_table.verticalHeader().hide()
+            self.texture_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+            self.texture_table.horizontalHeader().setSectionResizeMode(TextureTableModel.FILE_COLUMN, QHeaderView.Stretch)
+            self.texture_table.setMinimumHeight(200)
+            self.main_layout.addWidget(self.texture_table)
 
-                # Display the file path (filename)
-                filename = os.path.basename(data["filePath"])
-                self.add_text_label_sublayout(f"File: {filename}", "", True)
+            # Button
+            self.create_shader_button = self.add_button("CREATE YOUR SHADER", "After clicking this, your shader will be created")
+            self.create_shader_button.clicked.connect(self.make_shader)
+            self.save_manifest_button = self.add_button("SAVE MANIFEST", "Saves the materials with the chosen color spaces and normal maps, so they can be built again without scanning")
+            self.save_manifest_button.clicked.connect(self.save_manifest)
 
-                # Create a color space selector for each texture
-                color_space_selector = QComboBox()
-                color_space_selector.addItems(self.COLOR_SPACES)
+        self.color_space_model.setStringList(network.color_spaces())
 
-                # Set the default color space based on the texture details
-                color_space_index = color_space_selector.findText(data["colorSpace"])
-                if color_space_index != -1:
-                    color_space_selector.setCurrentIndex(color_space_index)
+        #Keeps the chosen set when it is still there
+        set_names = sorted(self.texture_sets, key=str.lower)
+        chosen = self.texture_set_box.currentText()
+        self.texture_set_box.blockSignals(True)
+        self.texture_set_box.clear()
+        self.texture_set_box.addItems(set_names)
+        if chosen in set_names:
+            self.texture_set_box.setCurrentText(chosen)
+        self.texture_set_box.blockSignals(False)
+        self.texture_set_box.setEnabled(len(set_names) > 1)
 
-                data["ui_colorSpace"] = color_space_selector
-                # Add the color space drop-down to the layout
-                self.add_text_label_sublayout("Color Space:", "", True)
-                self.sub_layout.addWidget(color_space_selector)
-                self.add_separator_sublayout()
+        self.show_texture_set(self.texture_set_box.currentText())
+        self.create_shader_button.setEnabled(len(self.texture_sets) > 0)
+        self.save_manifest_button.setEnabled(len(self.texture_sets) > 0)
 
-        self.main_layout.addLayout(self.sub_layout)
 
-            # Button
-        if self.create_shader_button == None:
-            self.create_shader_button = self.add_button("CREATE YOUR SHADER", "After clicking this, your shader will be created")
-            self.create_shader_button.clicked.connect(self.make_shader)
+    def show_texture_set(self, set_name:str):
+        """
+        Shows the texture maps of a texture set in the table
+        """
+        self.texture_maps = self.texture_sets.get(set_name, {})
+        self.texture_model.set_texture_maps(self.texture_maps)
 
 
+    @timing.run("make_shader")
     def make_shader(self,**kwargs):
         """
         Creates Standard Surface Shader, imports texture maps and connects them to the correct part of shader
+        Split texture sets get a shader each, named after the shader name and the set, all made in one go
         """
 
         if self.shader_name_field.text() == "":
@@ -369,170 +665,102 @@ class ShaderCreator(QtWidgets.QMainWindow):
             shader_name = shader_name.replace(" ", "_")
             self.shader_name_field.setText(shader_name)
 
-
-
-
-        shader = cmds.shadingNode('aiStandardSurface', asShader=True, name=shader_name)
-
-
-        #Gives a warning if the shader name is already exists
-        if shader != shader_name:
-            self.raise_warning(f"Material {self.shader_name_field.text()} already exists, created a material with name: {shader}")
-
-        shader_name = shader
+        templates = network.scene_templates if self.templates_check_box.isChecked() else None
+
+        #The color spaces chosen in the table are already in the texture maps
+        if self.split_sets_check_box.isChecked():
+            base_name = self.shader_name_field.text()
+            built = network.build_texture_sets(base_name, self.texture_sets, self.texture_model.normal_type, self.raise_warning,
+                                               self.shared_placement_check_box.isChecked(),
+                                               reuse_files=self.reuse_check_box.isChecked(), templates=templates,
+                                               update=self.update_existing_check_box.isChecked())
+            self.built_shaders = {set_name: (plan, names) for set_name, plan, names in built}
+            timing.note(shaders=[names["shader"] for set_name, plan, names in built], sets=len(built))
+            self.assign_built_shaders()
+            return
+
+        plan, names = network.build_plan(shader_name, self.texture_maps, self.texture_model.normal_type, self.raise_warning,
+                                         self.shared_placement_check_box.isChecked(), reuse_files=self.reuse_check_box.isChecked(),
+                                         templates=templates, update=self.update_existing_check_box.isChecked())
+        self.built_shaders = {"": (plan, names)}
+        shader = names["shader"]
+
+        timing.note(shader=shader, textures=len(self.texture_maps))
+        self.assign_built_shaders()
 
         if self.shader_name_field.text() == "":
-            self.shader_name_field.setPlaceholderText(shader_name)
+            self.shader_name_field.setPlaceholderText(shader)
         else:
-            self.shader_name_field.setText(shader_name)
-
-        shading_group = cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name=f"{shader_name}SG")
-        cmds.connectAttr(f"{shader}.outColor", f"{shading_group}.surfaceShader", force=True)
-
-        #All the connections for the place2d node
-
-        connections = ['rotateUV', 'offset', 'noiseUV', 'vertexCameraOne', 'vertexUvThree',
-                       'vertexUvTwo', 'vertexUvOne', 'repeatUV', 'wrapV', 'wrapU', 'stagger',
-                       'mirrorU', 'mirrorV', 'rotateFrame', 'translateFrame', 'coverage']
-
-
-        #Boolean if normal and bump exists at the same time
-
-        texture_maps_list = []
-        for texture_type in self.texture_maps:
-            texture_maps_list.append(texture_type)
-
-        createBump = "bump" in texture_maps_list and "normal" not in texture_maps_list
-
-
-
-
-
-
-        #This creates everything and connects based on the dictionary
-
-        for texture_type, details in self.texture_maps.items():
-
-            if "normal" == texture_type:
-
-
-
-                combo_box_normal = details["normal_selector"]  # Get user selection (DirectX/OpenGL)
-                normal_map_type = combo_box_normal.currentText()
-
-                normal_map_details = details.get(normal_map_type)
-
-                file_path = normal_map_details.get('filePath')
-
-
-                file_node = cmds.shadingNode('file', asTexture=True, name=f"{texture_type}_file")
-
-                place2d_node = cmds.shadingNode('place2dTexture', asUtility=True)
-
-                cmds.connectAttr(place2d_node + '.outUV', file_node + '.uvCoord')
-                cmds.connectAttr(place2d_node + '.outUvFilterSize', file_node + '.uvFilterSize')
-
-
-
-                for i in connections:
-                    cmds.connectAttr(place2d_node + '.' + i, file_node + '.' + i)
-
-
-                cmds.setAttr(f"{file_node}.fileTextureName", file_path, type="string")
-
-                # Apply color space from UI
-                selected_color_space = details['ui_colorSpace'].currentText()
-                cmds.setAttr(f"{file_node}.colorSpace", selected_color_space, type="string")
-
-                # Create and connect aiNormalMap node
-                normal_node = cmds.shadingNode('aiNormalMap', asUtility=True, name=f"{shader_name}_normal")
-
-
-
-
-                cmds.connectAttr(f"{file_node}.outColor", f"{normal_node}.input", force=True)
-                cmds.connectAttr(f"{normal_node}.outValue", f"{shader}.normalCamera", force=True)
-
-            elif "height" == texture_type:
-
-                #Height map connections with the displacement shader
-
-                file_node = cmds.shadingNode('file', asTexture=True, name=f"{texture_type}_file")
-                cmds.setAttr(f"{file_node}.fileTextureName", details['filePath'], type="string")
-
-                place2d_node = cmds.shadingNode('place2dTexture', asUtility=True)
+            self.shader_name_field.setText(shader)
 
-                cmds.connectAttr(place2d_node + '.outUV', file_node + '.uvCoord')
-                cmds.connectAttr(place2d_node + '.outUvFilterSize', file_node + '.uvFilterSize')
 
+    def assign_built_shaders(self):
+        """
+        Assigns the shaders just made to the meshes named like their texture set or shader, when it is ticked
+        """
+        if not self.assign_check_box.isChecked():
+            return
 
-
-                for i in connections:
-                    cmds.connectAttr(place2d_node + '.' + i, file_node + '.' + i)
-
-                # Apply color space from UI
-                selected_color_space = details['ui_colorSpace'].currentText()
-                cmds.setAttr(f"{file_node}.colorSpace", selected_color_space, type="string")
-                cmds.setAttr(f"{file_node}.alphaIsLuminance", details['enableAlphaIsLuminance'])
-
-                # Create and connect displacement shader
-                disp_node = cmds.shadingNode('displacementShader', asShader=True, name=f"{shader_name}_disp")
-                cmds.setAttr(f"{disp_node}.aiDisplacementZeroValue", 0.5)
-                cmds.connectAttr(f"{file_node}.outAlpha", f"{disp_node}.displacement", force=True)
-                cmds.connectAttr(f"{disp_node}.displacement", f"{shading_group}.displacementShader", force=True)
-
-
-            elif "bump" == texture_type:
-                #BUmp map connections
-
-                if createBump:
-                    file_node = cmds.shadingNode('file', asTexture=True, name=f"{texture_type}_file")
-                    cmds.setAttr(f"{file_node}.fileTextureName", details['filePath'], type="string")
-
-                    place2d_node = cmds.shadingNode('place2dTexture', asUtility=True)
-
-                    cmds.connectAttr(place2d_node + '.outUV', file_node + '.uvCoord')
-                    cmds.connectAttr(place2d_node + '.outUvFilterSize', file_node + '.uvFilterSize')
-
-                    for i in connections:
-                        cmds.connectAttr(place2d_node + '.' + i, file_node + '.' + i)
-
-                    selected_color_space = details['ui_colorSpace'].currentText()
-                    cmds.setAttr(f"{file_node}.colorSpace", selected_color_space, type="string")
-                    cmds.setAttr(f"{file_node}.alphaIsLuminance", details['enableAlphaIsLuminance'])
-
-                    bump_node = cmds.shadingNode('aiBump2d', asUtility=True)
-
-                    cmds.connectAttr(f"{file_node}.outAlpha", f"{bump_node}.bumpMap", force=True)
-
-                else:
-                    self.raise_warning("Bump map will not be created since there is a Normal map")
+        materials = [(assign.material_names(names["shader"], set_name=set_name), names["shadingGroup"])
+                     for set_name, (plan, names) in sorted(self.built_shaders.items())]
+        assign.assign_materials(materials, self.shader_config.matcher, self.raise_warning)
 
 
+    def shader_names(self)->dict:
+        """
+        Shader name of every texture set, the name it got when it was created or the one it would get
+        """
+        shader_names = {}
+        for set_name in self.texture_sets:
+            if set_name in self.built_shaders:
+                shader_names[set_name] = self.built_shaders[set_name][1]["shader"]
+            elif self.split_sets_check_box.isChecked():
+                shader_names[set_name] = core.shader_name_for_set(self.shader_name_field.text().replace(" ", "_"), set_name)
             else:
-                # Everything else
-                file_node = cmds.shadingNode('file', asTexture=True, name=f"{texture_type}_file")
-                cmds.setAttr(f"{file_node}.fileTextureName", details['filePath'], type="string")
+                shader_names[set_name] = self.shader_name_field.text().replace(" ", "_") or self.shader_name_field.placeholderText()
+        return shader_names
 
-                place2d_node = cmds.shadingNode('place2dTexture', asUtility=True)
-
-                cmds.connectAttr(place2d_node + '.outUV', file_node + '.uvCoord')
-                cmds.connectAttr(place2d_node + '.outUvFilterSize', file_node + '.uvFilterSize')
 
+    def save_manifest(self):
+        """
+        Saves the texture sets with everything chosen in the window to a manifest
+        """
+        manifest_path = QFileDialog.getSaveFileName(None, "Save Manifest", "", "Manifest (*.json)")[0]
+        if manifest_path == "":
+            return
+
+        shared_placement = self.shared_placement_check_box.isChecked()
+        shader_names = self.shader_names()
+        materials = [manifest.material_entry(shader_names[set_name], self.texture_sets[set_name], self.texture_model.normal_type,
+                                             shared_placement, self.folder_directory)
+                     for set_name in sorted(self.texture_sets, key=str.lower)]
+        try:
+            manifest.write_manifest(manifest_path, materials, self.shader_config)
+        except OSError as error:
+            self.raise_warning(f"Couldn't save the manifest: {error}")
 
 
-                for i in connections:
-                    cmds.connectAttr(place2d_node + '.' + i, file_node + '.' + i)
+    def build_from_manifests(self):
+        """
+        Builds the materials of the chosen manifests in one go, their texture directories aren't scanned
+        """
+        manifest_paths = QFileDialog.getOpenFileNames(None, "Build From Manifests", "", "Manifest (*.json)")[0]
+        if not manifest_paths:
+            return
 
-                # Apply color space from UI
-                selected_color_space = details['ui_colorSpace'].currentText()
-                cmds.setAttr(f"{file_node}.colorSpace", selected_color_space, type="string")
-                cmds.setAttr(f"{file_node}.alphaIsLuminance", details['enableAlphaIsLuminance'])
+        try:
+            manifest.build_manifests(manifest_paths, self.raise_warning, reuse_files=self.reuse_check_box.isChecked(),
+                                     check=self.check_manifest_check_box.isChecked())
+        except (OSError, ValueError) as error:
+            self.raise_warning(f"Couldn't build from the manifests: {error}")
 
-                # Connect based on connectType
-                connect_attr = "outColor" if details['connectType'].lower() == "color" else "outAlpha"
 
-                cmds.connectAttr(f"{file_node}.{connect_attr}", f"{shader}.{texture_type}", force=True)
+    def audit_scene(self):
+        """
+        Checks the file nodes of the shaders in the scene, warns about every problem and then how many there were
+        """
+        report = audit.audit_scene(self.shader_config, self.fix_audit_check_box.isChecked(), self.raise_warning)
+        self.raise_warning(audit.summary(report))
 
 
     def load_json(self)->bool:
@@ -543,21 +771,18 @@ class ShaderCreator(QtWidgets.QMainWindow):
         """
 
         flag = False
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        json_filename = 'ai_standard_surface_shader_config.json'
-
-        json_filepath = os.path.join(script_dir, json_filename)
 
         try:
-            with open(json_filepath, 'r') as json_file:
-                self.shader_config = json.load(json_file)
-                flag = True
+            #Compiled once per Maya session, read again only when the file changes
+            self.shader_config = core.get_shader_config()
+            self.matcher = self.shader_config.matcher
+            flag = True
 
 
-        except:
-            cmds.warning("Error with JSON file")
+        except (OSError, ValueError) as error:
+            cmds.warning(f"Error with JSON file: {error}")
             cmds.confirmDialog(message="There has been an issue with the JSON file.\n\nMake sure it is in the same directory as the script."
-                                       "\n\nReload script after", button=["OK"])
+                                       "\n\nOpen the window again after", button=["OK"])
 
 
 
@@ -592,21 +817,6 @@ class ShaderCreator(QtWidgets.QMainWindow):
         return label
 
 
-    def add_text_label_sublayout(self,msg:str,annotation:str,isEnabled:bool):
-
-        """
-        Makes a simple text but in the sublayout
-        """
-
-        label = QLabel()
-        label.setText(msg)
-        label.setToolTip(annotation)
-        label.setAlignment(Qt.AlignLeft)
-        label.setEnabled(isEnabled)
-        self.sub_layout.addWidget(label)
-        return label
-
-
     def add_text_field(self,label:str,label_w:int,label_h:int,box_w:int):
 
         """
@@ -643,10 +853,58 @@ class ShaderCreator(QtWidgets.QMainWindow):
         return button
 
 
+    def add_progress_bar(self):
+
+        """
+        Progress bar that keeps moving while the length of the work isn't known
+        """
+
+        progress_bar = QProgressBar()
+        progress_bar.setRange(0, 0)
+        self.main_layout.addWidget(progress_bar)
+
+        return progress_bar
+
+
+    def add_combo_box(self,label:str,annotation_str : str):
+
+        """
+        Drop down list with a label in front of it
+        """
+
+        combo_box_label = QLabel(label)
+        combo_box = QComboBox()
+        combo_box.setToolTip(annotation_str)
+        local_layout = QHBoxLayout()
+        local_layout.addWidget(combo_box_label)
+        local_layout.addWidget(combo_box)
+        self.main_layout.addLayout(local_layout)
+
+        return combo_box
+
+
+    def add_check_box(self,text_str : str,annotation_str : str):
+
+        """
+        Check box to turn options on and off
+        """
+
+        check_box = QCheckBox(text_str)
+        check_box.setToolTip(annotation_str)
+        local_layout = QHBoxLayout()
+        local_layout.addWidget(check_box)
+        self.main_layout.addLayout(local_layout)
+
+        return check_box
+
+
+@timing.run("show_ui")
+@timing.phase("ui")
 def show_ui():
     """
     Closes the main window if it was previously created.
     Makes a new main window.
+    Importing the module doesn't open it, call this from the shelf button
     """
     global Arnold_Standart_Surface_Shader_Window
     try:
@@ -655,6 +913,4 @@ def show_ui():
         pass
     Arnold_Standart_Surface_Shader_Window = ShaderCreator()
     Arnold_Standart_Surface_Shader_Window.show()
-
-# Run the UI
-show_ui()
+    return Arnold_Standart_Surface_Shader_Window
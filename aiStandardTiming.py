@@ -0,0 +1,182 @@
+#Jaroslav Lajta
+
+"""
+Times the phases of a run and counts the Maya commands it issues
+Nothing is recorded outside of a run, and a run only writes to the log when there is one
+Set AI_STANDARD_TIMING_LOG to a file, or pass --timing-log in batch mode, to append every run as one JSON line
+"""
+
+import os
+import json
+import time
+import socket
+import getpass
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+
+#Environment variable with the path of the JSON-lines log
+LOG_VARIABLE = "AI_STANDARD_TIMING_LOG"
+
+#Log used when the environment variable isn't set
+log_path = None
+
+class RunState(threading.local):
+    """
+    Recorder of the run in progress, every thread has its own
+    """
+    recorder = None
+
+
+local = RunState()
+
+
+class Recorder:
+    """
+    Seconds spent in every phase and the Maya commands issued during one run
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.phases = defaultdict(float)
+        self.commands = Counter()
+        self.info = {}
+
+    def add_time(self, phase_name: str, seconds: float):
+        self.phases[phase_name] += seconds
+
+    def count(self, command: str):
+        self.commands[command] += 1
+
+    def record(self) -> dict:
+        """
+        Returns the run as a dictionary, the way it is written to the log
+        """
+        return {
+            "run": self.name,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "user": getpass.getuser(),
+            "host": socket.gethostname(),
+            "seconds": round(time.perf_counter() - self.start, 6),
+            "phases": {phase_name: round(seconds, 6) for phase_name, seconds in self.phases.items()},
+            "commands": dict(self.commands.most_common()),
+            "info": self.info,
+        }
+
+    def summary(self) -> str:
+        """
+        Returns the phases and commands in one line for the script editor
+        """
+        record = self.record()
+        phases = ", ".join(f"{phase_name} {seconds * 1000:.0f} ms" for phase_name, seconds in record["phases"].items())
+        return f"{self.name}: {record['seconds'] * 1000:.0f} ms ({phases}), {sum(self.commands.values())} Maya commands"
+
+
+def current() -> Recorder:
+    """
+    Returns the recorder of the run in progress in this thread, None outside of a run
+    """
+    return local.recorder
+
+
+def current_log() -> str:
+    """
+    Returns the log the runs are written to, None when there is none
+    """
+    return os.environ.get(LOG_VARIABLE) or log_path
+
+
+def write_record(record: dict, path: str):
+    """
+    Appends one run to a JSON-lines log
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "a") as log_file:
+        log_file.write(json.dumps(record) + "\n")
+
+
+@contextmanager
+def run(name: str):
+    """
+    Records a run, a run started inside another one adds to the outer run
+    Runs belong to the thread that started them, a scan in the background is its own run
+    """
+    if current() is not None:
+        yield current()
+        return
+
+    recorder = local.recorder = Recorder(name)
+    try:
+        yield recorder
+    finally:
+        local.recorder = None
+        path = current_log()
+        if path:
+            try:
+                write_record(recorder.record(), path)
+            except OSError:
+                pass
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Adds the time spent inside to a phase of the run in progress
+    """
+    recorder = current()
+    if recorder is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add_time(name, time.perf_counter() - start)
+
+
+def count(command: str):
+    """
+    Counts a Maya call that doesn't go through maya.cmds, like an OpenMaya modifier step
+    """
+    recorder = current()
+    if recorder is not None:
+        recorder.count(command)
+
+
+def note(**info):
+    """
+    Adds facts about the run in progress, like how many files were found
+    """
+    recorder = current()
+    if recorder is not None:
+        recorder.info.update(info)
+
+
+class CountingCmds:
+    """
+    Stands in front of maya.cmds and counts every command called during a run
+    """
+
+    def __init__(self, cmds):
+        self.cmds = cmds
+
+    def __getattr__(self, command_name: str):
+        command = getattr(self.cmds, command_name)
+        if not callable(command):
+            return command
+
+        def counted(*args, **flags):
+            recorder = local.recorder
+            if recorder is not None:
+                recorder.count(command_name)
+            return command(*args, **flags)
+
+        #Found by normal lookup from now on
+        self.__dict__[command_name] = counted
+        return counted
@@ -0,0 +1,141 @@
+#Jaroslav Lajta
+
+"""
+Converts textures to tiled, mipmapped .tx files for Arnold with maketx, or another converter
+Every conversion runs as its own process, several at a time, and a .tx that is newer than its source is not made again
+"""
+
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import aiStandardCore as core
+import aiStandardTiming as timing
+
+
+#Environment variable that can point at the converter executable
+CONVERTER_VARIABLE = "AI_STANDARD_MAKETX"
+
+CONVERTER_NAME = "maketx"
+
+#Same options the Arnold TX Manager uses
+DEFAULT_ARGUMENTS = ["-v", "-u", "--unpremult", "--oiio", "--monochrome-detect", "--constant-color-detect",
+                     "--opaque-detect", "--filter", "lanczos3"]
+
+
+def mtoa_bin_folder() -> str:
+    """
+    Returns the bin folder of the loaded Arnold plugin, where maketx comes with it
+    """
+    try:
+        from maya import cmds
+        plugin_path = cmds.pluginInfo("mtoa", query=True, path=True)
+    except (ImportError, RuntimeError):
+        return None
+
+    return os.path.join(os.path.dirname(os.path.dirname(plugin_path)), "bin")
+
+
+def find_converter() -> str:
+    """
+    Returns the converter executable, from AI_STANDARD_MAKETX, the Arnold plugin or the PATH
+    """
+    converter = os.environ.get(CONVERTER_VARIABLE)
+    if converter:
+        return converter
+
+    bin_folder = mtoa_bin_folder()
+    if bin_folder is not None:
+        converter = shutil.which(CONVERTER_NAME, path=bin_folder)
+        if converter is not None:
+            return converter
+
+    return shutil.which(CONVERTER_NAME)
+
+
+def tx_path(filepath: str) -> str:
+    """
+    Returns the .tx path of a texture, it sits next to the source
+    """
+    return f"{os.path.splitext(filepath)[0]}.tx"
+
+
+def needs_conversion(source: str) -> bool:
+    """
+    True when the .tx is missing or older than its source
+    """
+    try:
+        return os.stat(tx_path(source)).st_mtime_ns < os.stat(source).st_mtime_ns
+    except FileNotFoundError:
+        return True
+
+
+def convert_texture(source: str, converter: str, arguments) -> str:
+    """
+    Makes the .tx of one texture
+    Returns None when it worked, otherwise what went wrong
+    """
+    command = [converter] + list(arguments) + [source, "-o", tx_path(source)]
+
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    except OSError as error:
+        return str(error)
+
+    if result.returncode != 0:
+        lines = result.stdout.strip().splitlines()
+        return lines[-1] if lines else f"{os.path.basename(converter)} failed with code {result.returncode}"
+
+    return None
+
+
+def convert_textures(sources, converter: str = None, arguments=None, workers: int = None) -> dict:
+    """
+    Makes the .tx files that are missing or out of date, several converter processes at a time
+    Returns what went wrong by source path, an empty dictionary when everything worked
+    """
+    if converter is None:
+        converter = find_converter()
+    if arguments is None:
+        arguments = DEFAULT_ARGUMENTS
+    if workers is None:
+        workers = os.cpu_count() or 4
+
+    sources = sorted(source for source in set(sources) if needs_conversion(source))
+    if not sources:
+        return {}
+    if converter is None:
+        return {source: f"{CONVERTER_NAME} wasn't found" for source in sources}
+
+    #The threads only wait for the converter processes, which do the real work
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        errors = executor.map(lambda source: convert_texture(source, converter, arguments), sources)
+        return {source: error for source, error in zip(sources, errors) if error is not None}
+
+
+def apply_tx(texture_maps: dict, converter: str = None, arguments=None, workers: int = None) -> list:
+    """
+    Converts all the textures and points them at their .tx files, tiled textures convert every tile
+    Textures that failed keep their source path
+    Returns the warnings about the failed conversions
+    """
+    entries = core.texture_entries(texture_maps)
+    sources = []
+    for texture_type, details in entries:
+        sources.extend(details.get("tiles", [details["filePath"]]))
+
+    with timing.phase("tx"):
+        errors = convert_textures(sources, converter, arguments, workers)
+
+    for texture_type, details in entries:
+        files = details.get("tiles", [details["filePath"]])
+        if any(source in errors for source in files):
+            continue
+
+        details["sourcePath"] = details["filePath"]
+        details["filePath"] = tx_path(details["filePath"])
+        if "tiles" in details:
+            details["tiles"] = [tx_path(tile) for tile in files]
+
+    return [f"Couldn't convert {os.path.basename(source)} to .tx: {error}" for source, error in sorted(errors.items())]
@@ -0,0 +1,50 @@
+#Jaroslav Lajta
+
+"""
+Maya plugin with the command that runs the MDGModifier built by aiStandardNetwork
+Running it through a command puts the whole shader network on the undo queue as one step
+It is loaded by aiStandardNetwork when needed
+"""
+
+import maya.api.OpenMaya as om
+
+
+maya_useNewAPI = True
+
+COMMAND_NAME = "aiStandardDoModifier"
+
+
+class DoModifierCommand(om.MPxCommand):
+    """
+    Takes the next waiting modifier from aiStandardNetwork and runs it
+    """
+
+    def __init__(self):
+        super(DoModifierCommand, self).__init__()
+        self.modifier = None
+
+    def doIt(self, args):
+        import aiStandardNetwork
+        self.modifier = aiStandardNetwork.pending_modifiers.pop(0)
+        self.redoIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+    @staticmethod
+    def creator():
+        return DoModifierCommand()
+
+
+def initializePlugin(plugin):
+    om.MFnPlugin(plugin, "Jaroslav Lajta", "1.0").registerCommand(COMMAND_NAME, DoModifierCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
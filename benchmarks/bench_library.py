@@ -0,0 +1,174 @@
+#Jaroslav Lajta
+
+"""
+Benchmark of the whole import on synthetic texture libraries, with a stand-in for maya.cmds
+
+    python benchmarks/bench_library.py [--files 1000 10000 100000] [--probe] [--results results.jsonl]
+
+A library is made on disk for every size, with mixed naming, UDIM tiles and DirectX/OpenGL/Undefined normal maps
+The real scanning, matching and building code runs against it and files/s, shaders/s and Maya commands per shader are printed
+The libraries come from a fixed seed, so with --results every commit appends numbers that can be compared with the last ones
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stand_in_maya
+
+cmds = stand_in_maya.install()
+
+import aiStandardCore as core
+import aiStandardNetwork as network
+import aiStandardBatch as batch
+
+
+TEXTURE_TYPES = ["baseColor", "specularRoughness", "metalness", "height", "emissionColor", "opacity",
+                 "coat", "transmission", "sheen", "specular", "subsurface"]
+
+ALIASES = {"baseColor": ["albedo", "diffuse"], "specularRoughness": ["roughness"], "metalness": ["metallic"]}
+
+EXTENSIONS = ["png", "exr", "tif", "jpg"]
+
+#PNG signature and IHDR of a 2048x2048 RGBA image, every texture gets it so the header reads have something to read
+PNG_HEADER = bytes.fromhex("89504e470d0a1a0a0000000d49484452000008000000080008060000005c72a866")
+
+
+def texture_name(texture_type: str, style: str, rng: random.Random) -> str:
+    """
+    Writes a texture type in one of the naming styles seen in libraries
+    """
+    words = core.TextureMatcher.WORDS.findall(texture_type)
+
+    if style == "alias" and texture_type in ALIASES:
+        return rng.choice(ALIASES[texture_type])
+    if style == "camel":
+        return "".join(word.capitalize() for word in words)
+    if style == "snake":
+        return "_".join(word.lower() for word in words)
+    if style == "hyphen":
+        return "-".join(word.lower() for word in words)
+    return texture_type.lower()
+
+
+def asset_files(asset: str, rng: random.Random) -> list:
+    """
+    Makes the file names of one asset
+    """
+    style = rng.choice(["lower", "camel", "snake", "hyphen", "alias"])
+    separator = "-" if style == "hyphen" else "_"
+    extension = rng.choice(EXTENSIONS)
+    tiles = [""] if rng.random() > 0.1 else [f".{1001 + tile}" for tile in range(4)]
+
+    names = [texture_name(texture_type, style, rng) for texture_type in rng.sample(TEXTURE_TYPES, rng.randint(3, 7))]
+    names.extend(f"normal{separator}{variant}" for variant in rng.choice([["directx"], ["opengl"], ["directx", "opengl"], [""]]))
+
+    files = [f"{asset}{separator}{name.rstrip(separator)}{tile}.{extension}" for name in names for tile in tiles]
+    files.append(f"{asset}_preview.jpg")
+    if rng.random() < 0.3:
+        files.append("notes.txt")
+    return files
+
+
+def make_library(root: str, file_count: int, seed: int = 0) -> int:
+    """
+    Writes asset folders with texture files until there are file_count files
+    Returns the number of files written
+    """
+    rng = random.Random(seed)
+    written = 0
+    asset = 0
+
+    while written < file_count:
+        folder = os.path.join(root, f"asset{asset:05d}")
+        os.makedirs(folder)
+        for filename in asset_files(f"asset{asset:05d}", rng):
+            with open(os.path.join(folder, filename), "wb") as texture_file:
+                texture_file.write(PNG_HEADER)
+            written += 1
+        asset += 1
+
+    return written
+
+
+def current_commit() -> str:
+    """
+    Returns the commit the benchmark runs on, None outside of git
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(file_count: int, probe_headers: bool = False, seed: int = 0) -> dict:
+    """
+    Makes a library and times the scan, the matching and the build on it
+    """
+    root = tempfile.mkdtemp(prefix="aiStandardBench")
+    try:
+        file_count = make_library(root, file_count, seed)
+        shader_config = core.get_shader_config()
+
+        start = time.perf_counter()
+        folders = batch.find_asset_folders(root)
+        plans = batch.plan_materials(folders, shader_config, warn=lambda msg: None, probe_headers=probe_headers,
+                                     color_spaces=cmds.color_spaces)
+        plan_time = time.perf_counter() - start
+
+        cmds.reset()
+        network.forget_file_index()
+        start = time.perf_counter()
+        index = network.file_index()
+        for folder, plan in plans:
+            network.execute_plan(plan, network.make_builder("cmds"), lambda msg: None, index)
+        build_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    shaders = len(plans)
+    return {
+        "commit": current_commit(),
+        "files": file_count,
+        "folders": len(folders),
+        "shaders": shaders,
+        "probe": probe_headers,
+        "filesPerSecond": round(file_count / plan_time),
+        "shadersPerSecond": round(shaders / build_time),
+        "commandsPerShader": round(cmds.command_count() / shaders, 1),
+        "commands": dict(cmds.counts.most_common()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the import on synthetic texture libraries")
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 10000], help="Library sizes in files")
+    parser.add_argument("--probe", action="store_true", help="Also read the image headers")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic libraries")
+    parser.add_argument("--results", default=None, help="Appends the results as JSON lines to this file")
+    args = parser.parse_args(argv)
+
+    for file_count in args.files:
+        result = run(file_count, args.probe, args.seed)
+        print(f"{result['files']} files in {result['folders']} folders, {result['shaders']} shaders:")
+        print(f"  scan and match: {result['filesPerSecond']:,} files/s")
+        print(f"  build:          {result['shadersPerSecond']:,} shaders/s")
+        print(f"  commands:       {result['commandsPerShader']} per shader")
+
+        if args.results:
+            with open(args.results, "a") as results_file:
+                results_file.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#Jaroslav Lajta
+
+"""
+Benchmark of the shader network planning and building with the recording backend, no Maya needed
+
+    python benchmarks/bench_shader_plan.py [number of materials]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiStandardCore as core
+import aiStandardNetwork as network
+
+
+def synthetic_texture_maps(shader_config: core.ShaderConfig) -> dict:
+    """
+    Makes the texture maps of a full PBR set without touching the disk
+    """
+    config = shader_config.textures
+    texture_maps = {}
+
+    for texture_type in ["baseColor", "metalness", "specularRoughness", "height", "emissionColor", "opacity",
+                         "coat", "coatRoughness", "sheen", "subsurface", "transmission"]:
+        texture_maps[texture_type] = core.texture_entry(f"/textures/asset_{texture_type}.exr", config[texture_type])
+
+    texture_maps["normal"] = {
+        "OpenGL": core.texture_entry("/textures/asset_normal_opengl.exr", config["normal"]),
+        "DirectX": core.texture_entry("/textures/asset_normal_directx.exr", config["normal"]),
+    }
+    return texture_maps
+
+
+def main(count: int = 2000):
+    shader_config = core.get_shader_config()
+    texture_maps = synthetic_texture_maps(shader_config)
+
+    for shared_placement in (True, False):
+        start = time.perf_counter()
+        plans = [network.plan_shader_network(f"asset{i}", texture_maps, shared_placement=shared_placement) for i in range(count)]
+        plan_time = time.perf_counter() - start
+
+        builder = network.RecordingBuilder()
+        start = time.perf_counter()
+        for plan in plans:
+            network.add_plan(builder, plan)
+        build_time = time.perf_counter() - start
+
+        label = "shared place2d" if shared_placement else "place2d per file"
+        print(f"{label}:")
+        print(f"  plan:     {count / plan_time:,.0f} shaders/s")
+        print(f"  record:   {count / build_time:,.0f} shaders/s")
+        print(f"  commands: {len(builder.commands) / count:.0f} per shader, {plans[0].stats()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,81 @@
+#Jaroslav Lajta
+
+"""
+Micro-benchmark of the compiled token index against the old nested loops of load_files
+
+    python benchmarks/bench_token_index.py [number of filenames]
+"""
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiStandardCore as core
+
+
+def synthetic_filenames(shader_config: dict, count: int, seed: int = 0) -> list:
+    """
+    Makes texture filenames in the usual lowercase underscore naming, with some files that don't match
+    """
+    rng = random.Random(seed)
+    texture_types = [texture_type.lower() for texture_type in shader_config["textures"]] + ["ao", "preview", "mask"]
+    extensions = ["png", "exr", "tif", "jpg"]
+
+    filenames = []
+    for i in range(count):
+        texture_type = rng.choice(texture_types)
+        if texture_type == "normal":
+            texture_type = f"normal_{rng.choice(['opengl', 'directx'])}"
+        filenames.append(f"asset{i % 500:03d}_{rng.choice(['rock', 'wood', 'metal_plate'])}_{texture_type}.{rng.choice(extensions)}")
+
+    return filenames
+
+
+def legacy_match(filenames: list, config: dict) -> int:
+    """
+    The matching loops as they were in load_files
+    """
+    matches = 0
+    for filename in filenames:
+        filename_split = os.path.splitext(filename.lower())[0].split("_")
+        for part in filename_split:
+            for texture_type, data in config.items():
+                if part.lower() == texture_type.lower():
+                    matches += 1
+                    break
+    return matches
+
+
+def indexed_match(filenames: list, matcher: core.TextureMatcher) -> int:
+    """
+    The same work done with the compiled token index
+    """
+    matches = 0
+    for filename in filenames:
+        matches += len(matcher.match(filename))
+    return matches
+
+
+def main(count: int = 50000):
+    shader_config = core.load_shader_config()
+    config = shader_config["textures"]
+    filenames = synthetic_filenames(shader_config, count)
+
+    compile_time = min(timeit.repeat(lambda: core.TextureMatcher(shader_config), number=1, repeat=5))
+    matcher = core.TextureMatcher(shader_config)
+
+    legacy_time = min(timeit.repeat(lambda: legacy_match(filenames, config), number=1, repeat=3))
+    indexed_time = min(timeit.repeat(lambda: indexed_match(filenames, matcher), number=1, repeat=3))
+
+    print(f"Filenames:        {count}")
+    print(f"Index compile:    {compile_time * 1000:.3f} ms")
+    print(f"Nested loops:     {legacy_time:.3f} s ({count / legacy_time:,.0f} files/s), {legacy_match(filenames, config)} matches")
+    print(f"Token index:      {indexed_time:.3f} s ({count / indexed_time:,.0f} files/s), {indexed_match(filenames, matcher)} matches")
+    print(f"Speedup:          {legacy_time / indexed_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,78 @@
+#Jaroslav Lajta
+
+"""
+Benchmark of the work done when the window opens
+
+    python benchmarks/bench_window_open.py
+
+With plain Python only the config loading is timed, read and compiled on every open like before against the compiled config kept per session
+Inside Maya it also opens the window, the cold open reads the config and the color spaces again like every open did before
+
+    import bench_window_open
+    bench_window_open.main()
+"""
+
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiStandardCore as core
+import aiStandardNetwork as network
+
+
+def load_every_time():
+    """
+    What every open did before, read the JSON and build the token index
+    """
+    return core.TextureMatcher(core.load_shader_config())
+
+
+def cold_open(window_class):
+    """
+    Opens the window with nothing remembered, like every open before
+    """
+    core.compiled_configs.clear()
+    network.input_color_spaces.clear()
+    window = window_class()
+    network.color_spaces()
+    return window
+
+
+def time_window(window_class, repeat: int):
+    """
+    Returns the best cold and warm time to make the window
+    """
+    cold = min(timeit.repeat(lambda: cold_open(window_class).deleteLater(), number=1, repeat=repeat))
+    warm = min(timeit.repeat(lambda: window_class().deleteLater(), number=1, repeat=repeat))
+    return cold, warm
+
+
+def main(repeat: int = 20):
+    start = time.perf_counter()
+    import aiStandardCache, aiStandardProbe, aiStandardTx
+    print(f"Import of the logic modules: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    every_time = min(timeit.repeat(load_every_time, number=1, repeat=repeat))
+    core.get_shader_config()
+    compiled = min(timeit.repeat(core.get_shader_config, number=1, repeat=repeat))
+    print(f"Config read on every open:   {every_time * 1000:.3f} ms")
+    print(f"Compiled config per session: {compiled * 1000:.3f} ms")
+
+    if network.cmds is None:
+        print("Maya isn't available, the window isn't timed")
+        return
+
+    start = time.perf_counter()
+    import aiStandardScript
+    print(f"Import of the window module: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    cold, warm = time_window(aiStandardScript.ShaderCreator, repeat)
+    print(f"Window open, cold:           {cold * 1000:.2f} ms")
+    print(f"Window open, warm:           {warm * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#Jaroslav Lajta
+
+"""
+Stand-in for maya.cmds so the real scanning, matching and building code runs without Maya
+Every call is counted by command and the nodes, attributes and connections are kept just well enough to answer the queries the tool makes
+maya.api isn't provided, so the "api" backend falls back to maya.cmds
+"""
+
+import sys
+import types
+from collections import Counter
+
+
+def counted(function):
+    """
+    Counts every call of a command
+    """
+    def command(self, *args, **flags):
+        self.counts[function.__name__] += 1
+        return function(self, *args, **flags)
+    command.__name__ = function.__name__
+    return command
+
+
+class StandInCmds(types.ModuleType):
+    """
+    Records the maya.cmds calls and keeps a tiny scene
+    """
+
+    def __init__(self, color_spaces=("sRGB", "Raw", "scene-linear Rec.709-sRGB", "ACEScg")):
+        super(StandInCmds, self).__init__("maya.cmds")
+        self.color_spaces = list(color_spaces)
+        self.counts = Counter()
+        self.nodes = {}
+        self.attrs = {}
+        self.connections = []
+        self.counters = {}
+
+    def reset(self):
+        """
+        Empties the scene and the counts
+        """
+        self.counts.clear()
+        self.nodes.clear()
+        self.attrs.clear()
+        self.connections.clear()
+        self.counters.clear()
+
+    def unique_name(self, name: str) -> str:
+        if name not in self.nodes:
+            return name
+
+        number = self.counters.get(name, 0) + 1
+        while f"{name}{number}" in self.nodes:
+            number += 1
+        self.counters[name] = number
+        return f"{name}{number}"
+
+    def add_node(self, node_type: str, name: str = None) -> str:
+        node = self.unique_name(name if name is not None else f"{node_type}1")
+        self.nodes[node] = node_type
+        return node
+
+    @counted
+    def shadingNode(self, node_type, name=None, **flags):
+        return self.add_node(node_type, name)
+
+    @counted
+    def createNode(self, node_type, name=None, **flags):
+        return self.add_node(node_type, name)
+
+    @counted
+    def sets(self, *objects, name=None, **flags):
+        if flags.get("empty"):
+            return self.add_node("shadingEngine", name)
+        return None
+
+    @counted
+    def setAttr(self, plug, *values, **flags):
+        self.attrs[plug] = values[0] if len(values) == 1 else values
+
+    @counted
+    def getAttr(self, plug, **flags):
+        return self.attrs.get(plug)
+
+    @counted
+    def connectAttr(self, source, target, **flags):
+        self.connections.append((source, target))
+
+    @counted
+    def objExists(self, name):
+        return name.split(".")[0] in self.nodes
+
+    @counted
+    def nodeType(self, name):
+        return self.nodes.get(name)
+
+    @counted
+    def ls(self, *names, type=None, **flags):
+        if type is None:
+            return list(self.nodes)
+        types_wanted = {type} if isinstance(type, str) else set(type)
+        return [node for node, node_type in self.nodes.items() if node_type in types_wanted]
+
+    @counted
+    def undoInfo(self, *args, **flags):
+        pass
+
+    @counted
+    def colorManagementPrefs(self, query=False, configFilePath=False, **flags):
+        return "stand-in.ocio" if configFilePath else list(self.color_spaces)
+
+    @counted
+    def warning(self, msg):
+        pass
+
+    @counted
+    def pluginInfo(self, *args, **flags):
+        return True
+
+    @counted
+    def loadPlugin(self, *args, **flags):
+        pass
+
+    def command_count(self) -> int:
+        """
+        Returns how many commands changed the scene, queries and bookkeeping left out
+        """
+        return sum(self.counts[command] for command in ("shadingNode", "createNode", "sets", "setAttr", "connectAttr"))
+
+
+def install() -> StandInCmds:
+    """
+    Puts the stand-in in place of maya.cmds, it has to run before the tool modules are imported
+    """
+    cmds = StandInCmds()
+    maya = types.ModuleType("maya")
+    maya.cmds = cmds
+    sys.modules["maya"] = maya
+    sys.modules["maya.cmds"] = cmds
+    return cmds